@@ -0,0 +1,449 @@
+"""
+Output writers and the streaming export stage for scraped course rows.
+
+Each format has a writer that accepts rows batch by batch, so output can
+be produced while the crawl is still running and never needs all rows in
+memory. ExportStage fans batches out to every requested writer, each in
+its own process, so writing is not serialised behind the GIL with the
+crawl or with the other writers, and no writer (or its first import of
+openpyxl or pyarrow) ever runs on the scraper's event loop.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import pickle
+import queue
+import textwrap
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Output formats supported by the export stage, in default write order
+EXPORT_FORMATS = ('csv', 'json', 'xlsx', 'parquet')
+DEFAULT_FORMATS = ('csv', 'json', 'xlsx')
+
+# Rows handed to the writers at a time
+BATCH_SIZE = 1000
+
+
+def parse_formats(value: str) -> List[str]:
+    """Parse a comma-separated --formats value into a list of format names"""
+    formats = [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+    if not formats:
+        raise argparse.ArgumentTypeError(f"no output format given (choose from {', '.join(EXPORT_FORMATS)})")
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unsupported format(s): {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)})"
+        )
+    return formats
+
+
+def iter_batches(rows: Iterable[Dict], size: int = BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Split a row iterator into lists of at most `size` rows"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ExportWriter:
+    """Base class: receives rows in batches via write() and finalises the file on close()"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.rows_written = 0
+
+    def write(self, rows: List[Dict]):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        """Release open file handles after a failed write; the partial file is left behind"""
+        pass
+
+    def close(self):
+        if not self.rows_written:
+            print(f"No data to save to {self.filename}!")
+            return
+        self.finish()
+        print(f"✓ Data saved to {self.filename}")
+
+
+class CsvWriter(ExportWriter):
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._file = None
+        self._writer = None
+
+    def write(self, rows: List[Dict]):
+        if not rows:
+            return
+        if self._file is None:
+            self._file = open(self.filename, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0].keys()))
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+        self.rows_written += len(rows)
+
+    def finish(self):
+        self._file.close()
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class JsonWriter(ExportWriter):
+    """Writes the same layout as json.dump(rows, indent=2), one row at a time"""
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._file = None
+
+    def write(self, rows: List[Dict]):
+        if not rows:
+            return
+        if self._file is None:
+            self._file = open(self.filename, 'w', encoding='utf-8')
+            self._file.write('[\n')
+        for row in rows:
+            if self.rows_written:
+                self._file.write(',\n')
+            self._file.write(textwrap.indent(json.dumps(row, ensure_ascii=False, indent=2), '  '))
+            self.rows_written += 1
+
+    def finish(self):
+        self._file.write('\n]')
+        self._file.close()
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class XlsxWriter(ExportWriter):
+    """Formatted Excel output in openpyxl write-only mode"""
+
+    # Rows used to size columns; widths must be set before the first row is written
+    WIDTH_SAMPLE_ROWS = 98
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._pending: List[Dict] = []
+        self._wb = None
+        self._ws = None
+        self._headers: List[str] = []
+
+    def write(self, rows: List[Dict]):
+        self.rows_written += len(rows)
+        if self._ws is None:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.WIDTH_SAMPLE_ROWS:
+                self._open()
+        else:
+            self._append(rows)
+
+    def _open(self):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+        from openpyxl.utils import get_column_letter
+
+        # Write-only mode streams rows to disk instead of keeping every cell in memory
+        self._wb = Workbook(write_only=True)
+        ws = self._ws = self._wb.create_sheet("Kurstap Courses")
+
+        # Get headers
+        headers = self._headers = list(self._pending[0].keys())
+
+        # Auto-adjust column widths from the first rows
+        sample = self._pending[:self.WIDTH_SAMPLE_ROWS]
+        for col_num, header in enumerate(headers, 1):
+            column_letter = get_column_letter(col_num)
+            # Set minimum width
+            max_length = len(header)
+            for course in sample:
+                cell_value = course.get(header, '')
+                if cell_value:
+                    max_length = max(max_length, len(str(cell_value)))
+
+            # Set width with some padding, but cap at 50
+            adjusted_width = min(max_length + 2, 50)
+            ws.column_dimensions[column_letter].width = adjusted_width
+
+        # Freeze the header row
+        ws.freeze_panes = "A2"
+
+        # Style for headers
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header_font = Font(color="FFFFFF", bold=True, size=12)
+        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+        # Write headers
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        self._cell_type = WriteOnlyCell
+        self._data_alignment = Alignment(wrap_text=True, vertical="top")
+        pending, self._pending = self._pending, []
+        self._append(pending)
+
+    def _append(self, rows: List[Dict]):
+        # Write data
+        for course in rows:
+            row_cells = []
+            for header in self._headers:
+                cell = self._cell_type(self._ws, value=course.get(header, ''))
+                cell.alignment = self._data_alignment
+                row_cells.append(cell)
+            self._ws.append(row_cells)
+
+    def finish(self):
+        if self._ws is None:
+            self._open()
+        self._wb.save(self.filename)
+
+
+class ParquetWriter(ExportWriter):
+    """Parquet output (requires pyarrow), one row group per ROW_GROUP_SIZE rows"""
+
+    ROW_GROUP_SIZE = 50_000
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._pending: List[Dict] = []
+        self._writer = None
+        self._schema = None
+
+    def write(self, rows: List[Dict]):
+        self._pending.extend(rows)
+        self.rows_written += len(rows)
+        if len(self._pending) >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self._schema = pa.schema([(header, pa.string()) for header in self._pending[0].keys()])
+            self._writer = pq.ParquetWriter(self.filename, self._schema)
+        self._writer.write_table(pa.Table.from_pylist(self._pending, schema=self._schema))
+        self._pending = []
+
+    def finish(self):
+        if self._pending:
+            self._flush()
+        self._writer.close()
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'json': JsonWriter,
+    'xlsx': XlsxWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def run_writer_process(fmt: str, filename: str, batches, results, profile_dir: Optional[str] = None):
+    """
+    Body of a writer process: write every pickled batch from the queue
+    until the None sentinel, then report (format, CPU seconds spent
+    writing, wall-clock time the file was finished, error). With
+    profile_dir set, the process profiles itself into that run directory
+    as export-<fmt>.
+    """
+    profiler = None
+    if profile_dir is not None:
+        from profiling import RunProfiler
+
+        profiler = RunProfiler(profile_dir, name=f"export-{fmt}")
+        profiler.start()
+    try:
+        busy, error = write_batches(fmt, filename, batches)
+        finished = time.time()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    results.put((fmt, busy, finished, error))
+
+
+def write_batches(fmt: str, filename: str, batches):
+    """
+    Write queued batches with the format's writer and return (CPU seconds,
+    error); the seconds are None after an error. After an error the
+    remaining batches are drained so the feeder never blocks.
+    """
+    writer = WRITERS[fmt](filename)
+    busy = 0.0
+    error = None
+    for payload in iter(batches.get, None):
+        if error is not None:
+            continue
+        started = time.process_time()
+        try:
+            writer.write(pickle.loads(payload))
+        except Exception as e:
+            error = str(e)
+        busy += time.process_time() - started
+
+    if error is None:
+        started = time.process_time()
+        try:
+            writer.close()
+        except Exception as e:
+            error = str(e)
+        busy += time.process_time() - started
+
+    if error is not None:
+        try:
+            writer.abort()
+        except Exception:
+            pass
+        # A failed writer has no meaningful timing
+        busy = None
+    return busy, error
+
+
+class ExportStage:
+    """
+    Streams rows to every requested format as they are scraped.
+
+        stage = ExportStage(['csv', 'xlsx'], 'kurstap_courses')
+        stage.start()
+        await stage.feed(rows)      # any number of times, e.g. per scraped course
+        timings = await stage.close()
+
+    Rows are collected into batches of `batch_size`. Each batch is pickled
+    once and queued to a dedicated writer process per format.
+    close() returns, per format, the wall-clock seconds from start() until
+    that file was finished, so the slowest format shows as the tail.
+    cpu_times holds the CPU seconds each writer spent on its own work,
+    which are not inflated by waiting for rows or sharing cores.
+    """
+
+    def __init__(self, formats: Iterable[str] = DEFAULT_FORMATS, basename: str = 'kurstap_courses',
+                 batch_size: int = BATCH_SIZE, queue_size: int = 16):
+        self.formats = list(dict.fromkeys(formats))
+        unknown = [fmt for fmt in self.formats if fmt not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unsupported export format(s): {', '.join(unknown)}")
+        if not self.formats:
+            raise ValueError("No export formats given")
+
+        self.basename = basename
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.timings: Dict[str, float] = {}
+        self.cpu_times: Dict[str, float] = {}
+        self._started = 0.0
+        self._pending: List[Dict] = []
+        self._queues: Dict[str, object] = {}
+        self._processes: Dict[str, object] = {}
+        self._results = None
+
+    def start(self, profile_dir=None):
+        """Launch one writer process per format, profiling each into profile_dir if given"""
+        # spawn rather than fork: the scraper runs an event loop and helper threads
+        context = multiprocessing.get_context('spawn')
+        self._started = time.time()
+        self._results = context.Queue()
+        for fmt in self.formats:
+            batches = context.Queue(maxsize=self.queue_size)
+            process = context.Process(target=run_writer_process,
+                                      args=(fmt, f"{self.basename}.{fmt}", batches, self._results,
+                                            str(profile_dir) if profile_dir else None),
+                                      name=f"export-{fmt}", daemon=True)
+            process.start()
+            self._queues[fmt] = batches
+            self._processes[fmt] = process
+
+    async def feed(self, rows: List[Dict]):
+        """Add scraped rows; a full batch is dispatched to the writers"""
+        self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            batch, self._pending = self._pending, []
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[Dict]):
+        loop = asyncio.get_running_loop()
+        # Pickled once here rather than once per queue
+        payload = pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)
+        for fmt in list(self._queues):
+            # put() blocks while a slow writer's queue is full; keep the event loop free
+            await loop.run_in_executor(None, self._put, fmt, payload)
+
+    async def close(self) -> Dict[str, float]:
+        """Flush the last batch, finish every file and report when each format was done"""
+        last_row = time.time()
+        if self._pending:
+            batch, self._pending = self._pending, []
+            await self._dispatch(batch)
+
+        loop = asyncio.get_running_loop()
+        for fmt in list(self._queues):
+            await loop.run_in_executor(None, self._put, fmt, None)
+
+        for fmt, busy, finished, error in await loop.run_in_executor(None, self._collect_results):
+            if error is not None:
+                print(f"Error saving {fmt}: {error}")
+            else:
+                self.timings[fmt] = finished - self._started
+                self.cpu_times[fmt] = busy
+
+        print(f"\nExport finished {time.time() - last_row:.2f}s after the last row")
+        print(f"  {'format':<8}{'done at':>10}{'after last row':>16}{'CPU':>9}")
+        for fmt in sorted(self.timings, key=self.timings.get):
+            done = self.timings[fmt]
+            print(f"  {fmt:<8}{done:>9.2f}s{done - (last_row - self._started):>+15.2f}s{self.cpu_times[fmt]:>8.2f}s")
+
+        return self.timings
+
+    def _put(self, fmt: str, payload):
+        """Queue a payload for a writer process, giving up on that format if the process has died"""
+        batches = self._queues[fmt]
+        while True:
+            try:
+                batches.put(payload, timeout=1)
+                return
+            except queue.Full:
+                if not self._processes[fmt].is_alive():
+                    # Nobody will read the buffered batches; don't block interpreter exit on them
+                    batches.cancel_join_thread()
+                    del self._queues[fmt]
+                    return
+
+    def _collect_results(self):
+        """Wait for every writer process to report back (or die)"""
+        results = []
+        while len(results) < len(self._processes):
+            try:
+                results.append(self._results.get(timeout=1))
+            except queue.Empty:
+                if not any(process.is_alive() for process in self._processes.values()):
+                    break
+        for fmt, process in self._processes.items():
+            process.join()
+            if process.exitcode:
+                print(f"Error saving {fmt}: writer process exited with code {process.exitcode}")
+                if fmt in self._queues:
+                    self._queues[fmt].cancel_join_thread()
+        return results
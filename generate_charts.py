@@ -3,12 +3,16 @@ Business Analytics Chart Generation for Kurstap Course Market Analysis
 Generates comprehensive visualizations focused on business insights and decision-making
 """
 
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import re
 from pathlib import Path
+from typing import Dict, List, Optional
+from profiling import profile_run
+from spill import chunk_files
 
 # Configure visualization style
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -18,19 +22,24 @@ plt.rcParams['font.size'] = 10
 plt.rcParams['axes.titlesize'] = 14
 plt.rcParams['axes.labelsize'] = 11
 
-# Create charts directory
+# Default input file, output directory and resolution
+INPUT_FILE = 'kurstap_courses.xlsx'
 CHARTS_DIR = Path('charts')
-CHARTS_DIR.mkdir(exist_ok=True)
+DPI = 300
 
-# Load data
-df = pd.read_excel('kurstap_courses.xlsx')
+# Columns the charts read; chunk-wise loading skips everything else
+CHART_COLUMNS = ['institution_name', 'course_title', 'duration', 'price', 'location']
 
-print("=" * 80)
-print("GENERATING BUSINESS ANALYTICS CHARTS")
-print("=" * 80)
-print(f"Total Records: {len(df)}")
-print(f"Analysis Period: Current Market Snapshot")
-print("=" * 80 + "\n")
+# Monthly price bands for the pricing distribution chart
+PRICE_BINS = [0, 60, 100, 150, 200, 300, 1000]
+PRICE_LABELS = ['<60 AZN', '60-100 AZN', '100-150 AZN', '150-200 AZN', '200-300 AZN', '>300 AZN']
+
+# Map duration to months
+DURATION_MAPPING = {
+    '1 ay': 1, '2 ay': 2, '3 ay': 3, '4 ay': 4, '5 ay': 5, '6 ay': 6,
+    '7 ay': 7, '8 ay': 8, '9 ay': 9, '10 ay': 10, '11 ay': 11, '12 ay': 12,
+    '1 il': 12
+}
 
 
 def clean_price(price_str):
@@ -62,327 +71,454 @@ def categorize_course(title):
         return 'Other'
 
 
-# Process data
-df['price_numeric'] = df['price'].apply(clean_price)
-df['course_category'] = df['course_title'].apply(categorize_course)
-df['district'] = df['location'].str.replace('Bakı', '').str.strip()
-df['district'] = df['district'].replace('', 'Bakı Center')
-
-
-# ===========================================================================================
-# CHART 1: Market Share - Top 15 Training Providers by Course Offerings
-# ===========================================================================================
-print("[1/10] Generating Market Share Analysis...")
-
-top_institutions = df['institution_name'].value_counts().head(15)
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.barh(range(len(top_institutions)), top_institutions.values, color='#2E86AB')
-ax.set_yticks(range(len(top_institutions)))
-ax.set_yticklabels(top_institutions.index, fontsize=10)
-ax.set_xlabel('Number of Course Offerings', fontsize=12, fontweight='bold')
-ax.set_title('Market Leaders: Top 15 Training Providers by Course Portfolio Size',
-             fontsize=15, fontweight='bold', pad=20)
-ax.invert_yaxis()
-
-# Add value labels
-for i, (idx, value) in enumerate(top_institutions.items()):
-    ax.text(value + 1, i, f'{value}', va='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '01_market_share_top_providers.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 2: Geographic Market Distribution
-# ===========================================================================================
-print("[2/10] Generating Geographic Distribution Analysis...")
-
-location_dist = df['location'].value_counts().head(12)
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.bar(range(len(location_dist)), location_dist.values, color='#A23B72')
-ax.set_xticks(range(len(location_dist)))
-ax.set_xticklabels(location_dist.index, rotation=45, ha='right', fontsize=10)
-ax.set_ylabel('Number of Course Offerings', fontsize=12, fontweight='bold')
-ax.set_title('Geographic Market Concentration: Course Distribution by Location',
-             fontsize=15, fontweight='bold', pad=20)
-
-# Add value labels
-for i, value in enumerate(location_dist.values):
-    ax.text(i, value + 10, f'{value}', ha='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '02_geographic_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 3: Course Duration Preferences
-# ===========================================================================================
-print("[3/10] Generating Course Duration Analysis...")
-
-duration_dist = df['duration'].value_counts().head(10)
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.barh(range(len(duration_dist)), duration_dist.values, color='#F18F01')
-ax.set_yticks(range(len(duration_dist)))
-ax.set_yticklabels(duration_dist.index, fontsize=11)
-ax.set_xlabel('Number of Courses', fontsize=12, fontweight='bold')
-ax.set_title('Course Duration Trends: Market Preference by Program Length',
-             fontsize=15, fontweight='bold', pad=20)
-ax.invert_yaxis()
-
-# Add value labels and percentages
-total_courses = duration_dist.sum()
-for i, (duration, value) in enumerate(duration_dist.items()):
-    percentage = (value / total_courses) * 100
-    ax.text(value + 5, i, f'{value} ({percentage:.1f}%)', va='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '03_duration_preferences.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 4: Price Point Distribution
-# ===========================================================================================
-print("[4/10] Generating Pricing Strategy Analysis...")
-
-# Filter out NaN and focus on monthly prices
-price_data = df[df['price'].notna() & df['price'].str.contains('Aylıq', na=False)].copy()
-price_data['price_numeric'] = price_data['price'].apply(clean_price)
-price_bins = [0, 60, 100, 150, 200, 300, 1000]
-price_labels = ['<60 AZN', '60-100 AZN', '100-150 AZN', '150-200 AZN', '200-300 AZN', '>300 AZN']
-price_data['price_range'] = pd.cut(price_data['price_numeric'], bins=price_bins, labels=price_labels)
-
-price_distribution = price_data['price_range'].value_counts().sort_index()
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.bar(range(len(price_distribution)), price_distribution.values, color='#06A77D')
-ax.set_xticks(range(len(price_distribution)))
-ax.set_xticklabels(price_distribution.index, fontsize=11)
-ax.set_ylabel('Number of Courses', fontsize=12, fontweight='bold')
-ax.set_title('Pricing Strategy Landscape: Monthly Course Fee Distribution',
-             fontsize=15, fontweight='bold', pad=20)
-
-# Add value labels
-for i, value in enumerate(price_distribution.values):
-    ax.text(i, value + 2, f'{value}', ha='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '04_pricing_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 5: Course Category Market Breakdown
-# ===========================================================================================
-print("[5/10] Generating Course Category Analysis...")
-
-category_dist = df['course_category'].value_counts()
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.barh(range(len(category_dist)), category_dist.values, color='#C73E1D')
-ax.set_yticks(range(len(category_dist)))
-ax.set_yticklabels(category_dist.index, fontsize=11)
-ax.set_xlabel('Number of Courses', fontsize=12, fontweight='bold')
-ax.set_title('Market Segmentation: Course Offerings by Category',
-             fontsize=15, fontweight='bold', pad=20)
-ax.invert_yaxis()
-
-# Add value labels and percentages
-total_courses = len(df)
-for i, (category, value) in enumerate(category_dist.items()):
-    percentage = (value / total_courses) * 100
-    ax.text(value + 15, i, f'{value} ({percentage:.1f}%)', va='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '05_course_categories.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 6: Market Concentration Analysis
-# ===========================================================================================
-print("[6/10] Generating Market Concentration Analysis...")
-
-# Calculate market share percentages
-total_courses = len(df)
-institution_counts = df['institution_name'].value_counts()
-top_5_share = institution_counts.head(5).sum() / total_courses * 100
-top_10_share = institution_counts.head(10).sum() / total_courses * 100
-top_20_share = institution_counts.head(20).sum() / total_courses * 100
-others_share = 100 - top_20_share
-
-concentration_data = {
-    'Top 5 Providers': top_5_share,
-    'Next 5 (6-10)': top_10_share - top_5_share,
-    'Next 10 (11-20)': top_20_share - top_10_share,
-    'Others (200+ providers)': others_share
-}
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.bar(range(len(concentration_data)), concentration_data.values(),
-              color=['#D62828', '#F77F00', '#FCBF49', '#90A955'])
-ax.set_xticks(range(len(concentration_data)))
-ax.set_xticklabels(concentration_data.keys(), fontsize=11)
-ax.set_ylabel('Market Share (%)', fontsize=12, fontweight='bold')
-ax.set_title('Market Concentration: How Fragmented is the Training Market?',
-             fontsize=15, fontweight='bold', pad=20)
-
-# Add value labels
-for i, (label, value) in enumerate(concentration_data.items()):
-    ax.text(i, value + 1, f'{value:.1f}%', ha='center', fontweight='bold', fontsize=11)
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '06_market_concentration.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 7: Average Price by Course Category
-# ===========================================================================================
-print("[7/10] Generating Price Comparison by Category...")
-
-category_price = df[df['price_numeric'].notna()].groupby('course_category')['price_numeric'].agg(['mean', 'count'])
-category_price = category_price[category_price['count'] >= 10].sort_values('mean', ascending=True)
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.barh(range(len(category_price)), category_price['mean'].values, color='#4361EE')
-ax.set_yticks(range(len(category_price)))
-ax.set_yticklabels(category_price.index, fontsize=11)
-ax.set_xlabel('Average Monthly Price (AZN)', fontsize=12, fontweight='bold')
-ax.set_title('Pricing Intelligence: Average Course Fees by Category',
-             fontsize=15, fontweight='bold', pad=20)
-ax.invert_yaxis()
-
-# Add value labels
-for i, (category, row) in enumerate(category_price.iterrows()):
-    ax.text(row['mean'] + 3, i, f'{row["mean"]:.0f} AZN', va='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '07_avg_price_by_category.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 8: District-Level Market Penetration (Bakı Only)
-# ===========================================================================================
-print("[8/10] Generating District-Level Analysis...")
-
-baku_df = df[df['location'].str.contains('Bakı', na=False)]
-district_dist = baku_df['district'].value_counts().head(10)
-
-fig, ax = plt.subplots(figsize=(14, 8))
-bars = ax.barh(range(len(district_dist)), district_dist.values, color='#7209B7')
-ax.set_yticks(range(len(district_dist)))
-ax.set_yticklabels(district_dist.index, fontsize=11)
-ax.set_xlabel('Number of Courses', fontsize=12, fontweight='bold')
-ax.set_title('Bakı Market Breakdown: Course Distribution by District',
-             fontsize=15, fontweight='bold', pad=20)
-ax.invert_yaxis()
-
-# Add value labels
-for i, value in enumerate(district_dist.values):
-    ax.text(value + 10, i, f'{value}', va='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '08_district_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 9: Provider Portfolio Diversity
-# ===========================================================================================
-print("[9/10] Generating Portfolio Diversity Analysis...")
-
-# Calculate how many different categories each top institution offers
-top_20_institutions = df['institution_name'].value_counts().head(20).index
-diversity_data = []
-
-for institution in top_20_institutions:
-    inst_df = df[df['institution_name'] == institution]
-    num_categories = inst_df['course_category'].nunique()
-    total_courses = len(inst_df)
-    diversity_data.append({
-        'Institution': institution,
-        'Categories': num_categories,
-        'Total Courses': total_courses
-    })
-
-diversity_df = pd.DataFrame(diversity_data).sort_values('Categories', ascending=True)
-
-fig, ax = plt.subplots(figsize=(14, 10))
-bars = ax.barh(range(len(diversity_df)), diversity_df['Categories'].values, color='#F72585')
-ax.set_yticks(range(len(diversity_df)))
-ax.set_yticklabels(diversity_df['Institution'].values, fontsize=9)
-ax.set_xlabel('Number of Course Categories Offered', fontsize=12, fontweight='bold')
-ax.set_title('Strategic Portfolio Analysis: Category Diversity of Top 20 Providers',
-             fontsize=15, fontweight='bold', pad=20)
-ax.invert_yaxis()
-
-# Add value labels
-for i, row in enumerate(diversity_df.itertuples()):
-    ax.text(row.Categories + 0.1, i, f'{row.Categories} categories', va='center', fontweight='bold', fontsize=9)
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '09_portfolio_diversity.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# ===========================================================================================
-# CHART 10: Duration vs Price Correlation
-# ===========================================================================================
-print("[10/10] Generating Duration-Price Relationship Analysis...")
-
-# Map duration to months
-duration_mapping = {
-    '1 ay': 1, '2 ay': 2, '3 ay': 3, '4 ay': 4, '5 ay': 5, '6 ay': 6,
-    '7 ay': 7, '8 ay': 8, '9 ay': 9, '10 ay': 10, '11 ay': 11, '12 ay': 12,
-    '1 il': 12
-}
-
-duration_price_df = df[df['price_numeric'].notna() & df['duration'].notna()].copy()
-duration_price_df['duration_months'] = duration_price_df['duration'].map(duration_mapping)
-duration_price_df = duration_price_df[duration_price_df['duration_months'].notna()]
-
-# Group by duration and calculate average price
-duration_avg_price = duration_price_df.groupby('duration_months')['price_numeric'].agg(['mean', 'count'])
-duration_avg_price = duration_avg_price[duration_avg_price['count'] >= 5].sort_index()
-
-fig, ax = plt.subplots(figsize=(14, 8))
-ax.plot(duration_avg_price.index, duration_avg_price['mean'].values,
-        marker='o', linewidth=3, markersize=10, color='#06A77D')
-ax.set_xlabel('Course Duration (Months)', fontsize=12, fontweight='bold')
-ax.set_ylabel('Average Monthly Price (AZN)', fontsize=12, fontweight='bold')
-ax.set_title('Pricing Strategy Insights: Price vs. Duration Relationship',
-             fontsize=15, fontweight='bold', pad=20)
-ax.grid(True, alpha=0.3)
-
-# Add value labels
-for x, y in zip(duration_avg_price.index, duration_avg_price['mean'].values):
-    ax.text(x, y + 5, f'{y:.0f} AZN', ha='center', fontweight='bold', fontsize=9)
-
-plt.tight_layout()
-plt.savefig(CHARTS_DIR / '10_duration_price_relationship.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-print("\n" + "=" * 80)
-print("CHART GENERATION COMPLETE!")
-print("=" * 80)
-print(f"All charts saved to: {CHARTS_DIR.absolute()}")
-print("\nGenerated Charts:")
-print("  1. Market Share - Top 15 Providers")
-print("  2. Geographic Distribution")
-print("  3. Course Duration Preferences")
-print("  4. Pricing Distribution")
-print("  5. Course Category Breakdown")
-print("  6. Market Concentration Analysis")
-print("  7. Average Price by Category")
-print("  8. Bakı District Distribution")
-print("  9. Provider Portfolio Diversity")
-print(" 10. Duration-Price Relationship")
-print("=" * 80)
+def load_data(input_file=INPUT_FILE):
+    """Load scraped courses from an xlsx, csv, json or parquet file"""
+    suffix = Path(input_file).suffix.lower()
+    if suffix == '.csv':
+        return pd.read_csv(input_file)
+    if suffix == '.json':
+        return pd.read_json(input_file)
+    if suffix == '.parquet':
+        return pd.read_parquet(input_file)
+    return pd.read_excel(input_file)
+
+
+def prepare_data(df):
+    """Add the derived columns used across charts"""
+    df['price_numeric'] = df['price'].apply(clean_price)
+    df['course_category'] = df['course_title'].apply(categorize_course)
+    df['district'] = df['location'].str.replace('Bakı', '').str.strip()
+    df['district'] = df['district'].replace('', 'Bakı Center')
+    return df
+
+
+def iter_chunks(input_path, chunksize=100_000):
+    """
+    Yield prepared chunks of the chart columns from a CSV file or from the
+    chunk_*.csv files of a spill run (the latest one when given the spill
+    directory), so the full dataset never has to be in memory at once.
+    """
+    input_path = Path(input_path)
+    files = chunk_files(input_path) if input_path.is_dir() else [input_path]
+    for path in files:
+        for chunk in pd.read_csv(path, usecols=CHART_COLUMNS, dtype=str, chunksize=chunksize):
+            yield prepare_data(chunk)
+
+
+def compute_aggregates(df):
+    """
+    Reduce a prepared dataset (or one chunk of it) to the additive counts
+    and sums every chart is drawn from. Aggregates of separate chunks can
+    be combined with merge_aggregates.
+    """
+    priced = df['price_numeric'].notna()
+    monthly = df['price'].str.contains('Aylıq', na=False)
+    duration_months = df['duration'].map(DURATION_MAPPING)
+    timed = priced & duration_months.notna()
+
+    return {
+        'records': len(df),
+        'institutions': df['institution_name'].value_counts(),
+        'locations': df['location'].value_counts(),
+        'durations': df['duration'].value_counts(),
+        'price_ranges': pd.cut(df.loc[monthly, 'price_numeric'], bins=PRICE_BINS, labels=PRICE_LABELS)
+                          .value_counts().reindex(PRICE_LABELS, fill_value=0),
+        'categories': df['course_category'].value_counts(),
+        'category_price': df[priced].groupby('course_category')['price_numeric'].agg(['sum', 'count']),
+        'districts': df.loc[df['location'].str.contains('Bakı', na=False), 'district'].value_counts(),
+        'institution_categories': df.groupby(['institution_name', 'course_category']).size(),
+        'duration_price': df.loc[timed, 'price_numeric'].groupby(duration_months[timed]).agg(['sum', 'count']),
+    }
+
+
+def merge_aggregates(left, right):
+    """Combine the aggregates of two disjoint chunks"""
+    merged = {'records': left['records'] + right['records']}
+    for key, value in left.items():
+        if key == 'records':
+            continue
+        levels = list(range(value.index.nlevels))
+        merged[key] = pd.concat([value, right[key]]).groupby(level=levels, sort=False).sum()
+    merged['price_ranges'] = merged['price_ranges'].reindex(PRICE_LABELS, fill_value=0)
+    return merged
+
+
+def aggregate_chunks(input_path, chunksize=100_000):
+    """Aggregate a CSV file or spill directory chunk by chunk"""
+    aggregates = None
+    for chunk in iter_chunks(input_path, chunksize):
+        partial = compute_aggregates(chunk)
+        aggregates = partial if aggregates is None else merge_aggregates(aggregates, partial)
+
+    if aggregates is None:
+        raise ValueError(f"No rows found in {input_path}")
+    return aggregates
+
+
+def top(counts, n=None):
+    """Largest counts first, keeping the existing order between ties"""
+    counts = counts.sort_values(ascending=False, kind='stable')
+    return counts.head(n) if n is not None else counts
+
+
+def generate_charts(df, charts_dir=CHARTS_DIR, dpi=DPI):
+    """Render all ten business analytics charts into charts_dir"""
+    plot_charts(compute_aggregates(df), charts_dir, dpi)
+
+
+def plot_charts(aggregates, charts_dir=CHARTS_DIR, dpi=DPI):
+    """Render all ten charts from precomputed aggregates"""
+    charts_dir = Path(charts_dir)
+    charts_dir.mkdir(parents=True, exist_ok=True)
+    total_records = aggregates['records']
+    institution_counts = top(aggregates['institutions'])
+
+    print("=" * 80)
+    print("GENERATING BUSINESS ANALYTICS CHARTS")
+    print("=" * 80)
+    print(f"Total Records: {total_records}")
+    print(f"Analysis Period: Current Market Snapshot")
+    print("=" * 80 + "\n")
+
+    # ===========================================================================================
+    # CHART 1: Market Share - Top 15 Training Providers by Course Offerings
+    # ===========================================================================================
+    print("[1/10] Generating Market Share Analysis...")
+
+    top_institutions = institution_counts.head(15)
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.barh(range(len(top_institutions)), top_institutions.values, color='#2E86AB')
+    ax.set_yticks(range(len(top_institutions)))
+    ax.set_yticklabels(top_institutions.index, fontsize=10)
+    ax.set_xlabel('Number of Course Offerings', fontsize=12, fontweight='bold')
+    ax.set_title('Market Leaders: Top 15 Training Providers by Course Portfolio Size',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+
+    # Add value labels
+    for i, (idx, value) in enumerate(top_institutions.items()):
+        ax.text(value + 1, i, f'{value}', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '01_market_share_top_providers.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 2: Geographic Market Distribution
+    # ===========================================================================================
+    print("[2/10] Generating Geographic Distribution Analysis...")
+
+    location_dist = top(aggregates['locations'], 12)
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.bar(range(len(location_dist)), location_dist.values, color='#A23B72')
+    ax.set_xticks(range(len(location_dist)))
+    ax.set_xticklabels(location_dist.index, rotation=45, ha='right', fontsize=10)
+    ax.set_ylabel('Number of Course Offerings', fontsize=12, fontweight='bold')
+    ax.set_title('Geographic Market Concentration: Course Distribution by Location',
+                 fontsize=15, fontweight='bold', pad=20)
+
+    # Add value labels
+    for i, value in enumerate(location_dist.values):
+        ax.text(i, value + 10, f'{value}', ha='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '02_geographic_distribution.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 3: Course Duration Preferences
+    # ===========================================================================================
+    print("[3/10] Generating Course Duration Analysis...")
+
+    duration_dist = top(aggregates['durations'], 10)
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.barh(range(len(duration_dist)), duration_dist.values, color='#F18F01')
+    ax.set_yticks(range(len(duration_dist)))
+    ax.set_yticklabels(duration_dist.index, fontsize=11)
+    ax.set_xlabel('Number of Courses', fontsize=12, fontweight='bold')
+    ax.set_title('Course Duration Trends: Market Preference by Program Length',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+
+    # Add value labels and percentages
+    total_courses = duration_dist.sum()
+    for i, (duration, value) in enumerate(duration_dist.items()):
+        percentage = (value / total_courses) * 100
+        ax.text(value + 5, i, f'{value} ({percentage:.1f}%)', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '03_duration_preferences.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 4: Price Point Distribution
+    # ===========================================================================================
+    print("[4/10] Generating Pricing Strategy Analysis...")
+
+    # Monthly prices only, binned into price bands
+    price_distribution = aggregates['price_ranges']
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.bar(range(len(price_distribution)), price_distribution.values, color='#06A77D')
+    ax.set_xticks(range(len(price_distribution)))
+    ax.set_xticklabels(price_distribution.index, fontsize=11)
+    ax.set_ylabel('Number of Courses', fontsize=12, fontweight='bold')
+    ax.set_title('Pricing Strategy Landscape: Monthly Course Fee Distribution',
+                 fontsize=15, fontweight='bold', pad=20)
+
+    # Add value labels
+    for i, value in enumerate(price_distribution.values):
+        ax.text(i, value + 2, f'{value}', ha='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '04_pricing_distribution.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 5: Course Category Market Breakdown
+    # ===========================================================================================
+    print("[5/10] Generating Course Category Analysis...")
+
+    category_dist = top(aggregates['categories'])
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.barh(range(len(category_dist)), category_dist.values, color='#C73E1D')
+    ax.set_yticks(range(len(category_dist)))
+    ax.set_yticklabels(category_dist.index, fontsize=11)
+    ax.set_xlabel('Number of Courses', fontsize=12, fontweight='bold')
+    ax.set_title('Market Segmentation: Course Offerings by Category',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+
+    # Add value labels and percentages
+    total_courses = total_records
+    for i, (category, value) in enumerate(category_dist.items()):
+        percentage = (value / total_courses) * 100
+        ax.text(value + 15, i, f'{value} ({percentage:.1f}%)', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '05_course_categories.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 6: Market Concentration Analysis
+    # ===========================================================================================
+    print("[6/10] Generating Market Concentration Analysis...")
+
+    # Calculate market share percentages
+    total_courses = total_records
+    top_5_share = institution_counts.head(5).sum() / total_courses * 100
+    top_10_share = institution_counts.head(10).sum() / total_courses * 100
+    top_20_share = institution_counts.head(20).sum() / total_courses * 100
+    others_share = 100 - top_20_share
+
+    concentration_data = {
+        'Top 5 Providers': top_5_share,
+        'Next 5 (6-10)': top_10_share - top_5_share,
+        'Next 10 (11-20)': top_20_share - top_10_share,
+        'Others (200+ providers)': others_share
+    }
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.bar(range(len(concentration_data)), concentration_data.values(),
+                  color=['#D62828', '#F77F00', '#FCBF49', '#90A955'])
+    ax.set_xticks(range(len(concentration_data)))
+    ax.set_xticklabels(concentration_data.keys(), fontsize=11)
+    ax.set_ylabel('Market Share (%)', fontsize=12, fontweight='bold')
+    ax.set_title('Market Concentration: How Fragmented is the Training Market?',
+                 fontsize=15, fontweight='bold', pad=20)
+
+    # Add value labels
+    for i, (label, value) in enumerate(concentration_data.items()):
+        ax.text(i, value + 1, f'{value:.1f}%', ha='center', fontweight='bold', fontsize=11)
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '06_market_concentration.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 7: Average Price by Course Category
+    # ===========================================================================================
+    print("[7/10] Generating Price Comparison by Category...")
+
+    category_price = aggregates['category_price'].assign(
+        mean=lambda frame: frame['sum'] / frame['count'])
+    category_price = category_price[category_price['count'] >= 10].sort_values('mean', ascending=True)
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.barh(range(len(category_price)), category_price['mean'].values, color='#4361EE')
+    ax.set_yticks(range(len(category_price)))
+    ax.set_yticklabels(category_price.index, fontsize=11)
+    ax.set_xlabel('Average Monthly Price (AZN)', fontsize=12, fontweight='bold')
+    ax.set_title('Pricing Intelligence: Average Course Fees by Category',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+
+    # Add value labels
+    for i, (category, row) in enumerate(category_price.iterrows()):
+        ax.text(row['mean'] + 3, i, f'{row["mean"]:.0f} AZN', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '07_avg_price_by_category.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 8: District-Level Market Penetration (Bakı Only)
+    # ===========================================================================================
+    print("[8/10] Generating District-Level Analysis...")
+
+    district_dist = top(aggregates['districts'], 10)
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.barh(range(len(district_dist)), district_dist.values, color='#7209B7')
+    ax.set_yticks(range(len(district_dist)))
+    ax.set_yticklabels(district_dist.index, fontsize=11)
+    ax.set_xlabel('Number of Courses', fontsize=12, fontweight='bold')
+    ax.set_title('Bakı Market Breakdown: Course Distribution by District',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+
+    # Add value labels
+    for i, value in enumerate(district_dist.values):
+        ax.text(value + 10, i, f'{value}', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '08_district_distribution.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 9: Provider Portfolio Diversity
+    # ===========================================================================================
+    print("[9/10] Generating Portfolio Diversity Analysis...")
+
+    # Calculate how many different categories each top institution offers
+    top_20_institutions = institution_counts.head(20).index
+    categories_per_institution = aggregates['institution_categories'].groupby(level=0).size()
+    diversity_data = []
+
+    for institution in top_20_institutions:
+        num_categories = int(categories_per_institution.get(institution, 0))
+        total_courses = int(institution_counts[institution])
+        diversity_data.append({
+            'Institution': institution,
+            'Categories': num_categories,
+            'Total Courses': total_courses
+        })
+
+    diversity_df = pd.DataFrame(diversity_data).sort_values('Categories', ascending=True)
+
+    fig, ax = plt.subplots(figsize=(14, 10))
+    bars = ax.barh(range(len(diversity_df)), diversity_df['Categories'].values, color='#F72585')
+    ax.set_yticks(range(len(diversity_df)))
+    ax.set_yticklabels(diversity_df['Institution'].values, fontsize=9)
+    ax.set_xlabel('Number of Course Categories Offered', fontsize=12, fontweight='bold')
+    ax.set_title('Strategic Portfolio Analysis: Category Diversity of Top 20 Providers',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+
+    # Add value labels
+    for i, row in enumerate(diversity_df.itertuples()):
+        ax.text(row.Categories + 0.1, i, f'{row.Categories} categories', va='center', fontweight='bold', fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '09_portfolio_diversity.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+    # ===========================================================================================
+    # CHART 10: Duration vs Price Correlation
+    # ===========================================================================================
+    print("[10/10] Generating Duration-Price Relationship Analysis...")
+
+    # Average price per duration in months
+    duration_avg_price = aggregates['duration_price'].assign(
+        mean=lambda frame: frame['sum'] / frame['count'])
+    duration_avg_price = duration_avg_price[duration_avg_price['count'] >= 5].sort_index()
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    ax.plot(duration_avg_price.index, duration_avg_price['mean'].values,
+            marker='o', linewidth=3, markersize=10, color='#06A77D')
+    ax.set_xlabel('Course Duration (Months)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Average Monthly Price (AZN)', fontsize=12, fontweight='bold')
+    ax.set_title('Pricing Strategy Insights: Price vs. Duration Relationship',
+                 fontsize=15, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3)
+
+    # Add value labels
+    for x, y in zip(duration_avg_price.index, duration_avg_price['mean'].values):
+        ax.text(x, y + 5, f'{y:.0f} AZN', ha='center', fontweight='bold', fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig(charts_dir / '10_duration_price_relationship.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+    print("\n" + "=" * 80)
+    print("CHART GENERATION COMPLETE!")
+    print("=" * 80)
+    print(f"All charts saved to: {charts_dir.absolute()}")
+    print("\nGenerated Charts:")
+    print("  1. Market Share - Top 15 Providers")
+    print("  2. Geographic Distribution")
+    print("  3. Course Duration Preferences")
+    print("  4. Pricing Distribution")
+    print("  5. Course Category Breakdown")
+    print("  6. Market Concentration Analysis")
+    print("  7. Average Price by Category")
+    print("  8. Bakı District Distribution")
+    print("  9. Provider Portfolio Diversity")
+    print(" 10. Duration-Price Relationship")
+    print("=" * 80)
+
+
+def run_charts(settings: Dict):
+    """Chart the input of the [charts] settings; shared by this script and `kurstap charts`"""
+    input_path = Path(settings['input'])
+    # Only CSV files and spill runs can be read chunk by chunk; other formats are loaded whole
+    chunked = input_path.is_dir() or (settings['chunksize'] and input_path.suffix.lower() == '.csv')
+    if settings['chunksize'] and not chunked:
+        print(f"chunksize applies to CSV input only, loading {input_path} in full")
+
+    with profile_run(settings['profile'], 'charts', settings['profile_dir']):
+        if chunked:
+            aggregates = aggregate_chunks(settings['input'], settings['chunksize'] or 100_000)
+            plot_charts(aggregates, settings['charts_dir'], settings['dpi'])
+        else:
+            generate_charts(prepare_data(load_data(settings['input'])), settings['charts_dir'], settings['dpi'])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate business analytics charts from scraped courses")
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help=f"Scraped data file (xlsx, csv, json or parquet), spill run or spill directory "
+                             f"(latest run) (default: {INPUT_FILE})")
+    parser.add_argument('--charts-dir', default=str(CHARTS_DIR),
+                        help=f"Directory to write charts into (default: {CHARTS_DIR})")
+    parser.add_argument('--dpi', type=int, default=DPI,
+                        help=f"Chart resolution (default: {DPI})")
+    parser.add_argument('--chunksize', type=int,
+                        help="Aggregate a CSV input chunk by chunk with this many rows per chunk; other formats are loaded whole "
+                             "(always used for spill directories)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile the run (cProfile, tracemalloc, sampled stacks)")
+    parser.add_argument('--profile-dir', default='profiles',
+                        help="Directory for profiling run folders (default: profiles)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    run_charts(vars(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Command-line entry point for the Kurstap scraper and analytics.
+
+    python kurstap.py scrape [--run-profile fast|polite|offline|large] [options]
+    python kurstap.py charts [options]
+    python kurstap.py bench [options]
+    python kurstap.py diff OLD NEW [options]
+
+Settings come from kurstap.toml (see --config), optionally overlaid with a
+named run profile, and finally with any flags given on the command line.
+Heavy dependencies are imported inside each subcommand so that `scrape`
+never loads pandas or matplotlib, and openpyxl is only loaded when XLSX
+output is actually written.
+"""
+
+import argparse
+import asyncio
+import copy
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_CONFIG_FILE = 'kurstap.toml'
+
+# Built-in defaults, used for any setting the config file does not provide
+DEFAULT_CONFIG = {
+    'scrape': {
+        'max_concurrent_requests': 20,
+        'max_per_page': 8,
+        'request_timeout': 30.0,
+        'request_delay': 0.0,
+        'cache_dir': '',
+        'offline': False,
+        'formats': ['csv', 'json', 'xlsx'],
+        'output': 'kurstap_courses',
+        'spill_dir': '',
+        'max_rows_in_memory': 50_000,
+        'profile': False,
+        'profile_dir': 'profiles',
+    },
+    'charts': {
+        'input': 'kurstap_courses.xlsx',
+        'charts_dir': 'charts',
+        'dpi': 300,
+        'chunksize': 0,
+        'profile': False,
+        'profile_dir': 'profiles',
+    },
+    'bench': {
+        'input': 'kurstap_courses.json',
+        'formats': ['csv', 'json', 'xlsx'],
+        'repeat': 3,
+    },
+    'diff': {
+        'old': '',
+        'new': '',
+        'json_out': '',
+        'limit': 20,
+    },
+}
+
+# How each setting type is described in config errors
+TYPE_NAMES = {
+    bool: 'true or false',
+    int: 'an integer',
+    float: 'a number',
+    str: 'a string',
+    list: 'a list of strings',
+}
+
+
+def read_toml(path: Path) -> Dict:
+    """Parse a TOML file with tomllib (Python 3.11+) or the tomli backport"""
+    try:
+        import tomllib
+    except ModuleNotFoundError:
+        import tomli as tomllib
+
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def load_config(config_file: Optional[str] = None, run_profile: Optional[str] = None) -> Dict:
+    """
+    Build the effective configuration: built-in defaults, then the config
+    file's top-level sections, then the sections of the chosen run profile.
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+
+    path = Path(config_file or DEFAULT_CONFIG_FILE)
+    file_config = {}
+    if path.exists():
+        file_config = read_toml(path)
+    elif config_file:
+        raise SystemExit(f"Config file not found: {path}")
+
+    layers = [(str(path), {k: v for k, v in file_config.items() if k != 'profiles'})]
+    if run_profile:
+        profiles = file_config.get('profiles', {})
+        if run_profile not in profiles:
+            available = ', '.join(sorted(profiles)) or 'none'
+            raise SystemExit(f"Unknown run profile '{run_profile}' (available: {available})")
+        profile = {k: v for k, v in profiles[run_profile].items() if k != 'description'}
+        layers.append((f"{path} [profiles.{run_profile}]", profile))
+
+    for source, layer in layers:
+        for section, values in layer.items():
+            if section not in config or not isinstance(values, dict):
+                raise SystemExit(f"Unknown config section '{section}' in {source} "
+                                 f"(expected: {', '.join(config)})")
+            for key, value in values.items():
+                check_setting(section, key, value, source)
+            config[section].update(values)
+
+    return config
+
+
+def check_setting(section: str, key: str, value, source: str):
+    """Reject settings that do not exist in DEFAULT_CONFIG or have the wrong type"""
+    if key not in DEFAULT_CONFIG[section]:
+        raise SystemExit(f"Unknown setting '{key}' in [{section}] of {source} "
+                         f"(expected one of: {', '.join(DEFAULT_CONFIG[section])})")
+
+    expected = type(DEFAULT_CONFIG[section][key])
+    if expected is float:
+        # Whole numbers are fine for float settings, e.g. request_timeout = 30
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif expected is int:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    elif expected is list:
+        valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+    else:
+        valid = isinstance(value, expected)
+    if not valid:
+        raise SystemExit(f"Setting '{key}' in [{section}] of {source} must be {TYPE_NAMES[expected]}, got {value!r}")
+
+
+def apply_overrides(settings: Dict, args: argparse.Namespace) -> Dict:
+    """Overlay command-line flags that were actually given onto a config section"""
+    settings = dict(settings)
+    for key in settings:
+        value = getattr(args, key, None)
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+def parse_format_list(value: str) -> List[str]:
+    from exporters import parse_formats
+
+    return parse_formats(value)
+
+
+def check_formats(formats: List[str]):
+    """Reject unknown formats from the config file before any work starts"""
+    from exporters import parse_formats
+
+    try:
+        parse_formats(','.join(formats))
+    except argparse.ArgumentTypeError as e:
+        raise SystemExit(f"Invalid formats setting: {e}")
+
+
+def run_scrape(settings: Dict):
+    from scraper_async import run_scrape as scrape
+
+    scrape(settings)
+
+
+def run_charts(settings: Dict):
+    from generate_charts import run_charts as charts
+
+    charts(settings)
+
+
+def load_rows(input_file: str) -> List[Dict]:
+    """Load previously scraped rows from a CSV or JSON export"""
+    import csv
+    import json
+
+    path = Path(input_file)
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_bench(settings: Dict):
+    """Time the export stage on an existing scrape, once per repetition"""
+    import tempfile
+    from scraper_async import KurstapAsyncScraper
+
+    check_formats(settings['formats'])
+    rows = load_rows(settings['input'])
+    print(f"Loaded {len(rows)} rows from {settings['input']}")
+
+    scraper = KurstapAsyncScraper()
+    scraper.courses_data = rows
+    results: Dict[str, List[float]] = {fmt: [] for fmt in settings['formats']}
+
+    with tempfile.TemporaryDirectory(prefix='kurstap-bench-') as tmp:
+        for run in range(1, settings['repeat'] + 1):
+            print(f"\n--- Run {run}/{settings['repeat']} ---")
+            started = time.perf_counter()
+            timings = asyncio.run(scraper.export(settings['formats'], str(Path(tmp) / 'bench')))
+            for fmt, elapsed in timings.items():
+                results[fmt].append(elapsed)
+            results.setdefault('total', []).append(time.perf_counter() - started)
+
+    print(f"\n{'='*60}")
+    print("Seconds until each format was finished, and for the whole export")
+    print(f"{'stage':<10}{'best':>10}{'mean':>10}")
+    for stage, samples in results.items():
+        if samples:
+            print(f"{stage:<10}{min(samples):>9.2f}s{sum(samples) / len(samples):>9.2f}s")
+    print(f"{'='*60}")
+
+
+def run_diff(settings: Dict):
+    from snapshot_diff import run_diff as diff
+
+    diff(settings['old'], settings['new'], settings['json_out'] or None, settings['limit'])
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--config', help=f"TOML config file (default: {DEFAULT_CONFIG_FILE} if present)")
+    parser.add_argument('--run-profile', help="Named profile from the config file, e.g. fast, polite, offline")
+
+
+def add_scrape_arguments(parser: argparse.ArgumentParser):
+    """Flags of `kurstap scrape`, also used by scraper_async.py; unset flags keep the config value"""
+    parser.add_argument('--max-concurrent-requests', type=int)
+    parser.add_argument('--max-per-page', type=int, help="Listing page size used for pagination")
+    parser.add_argument('--request-timeout', type=float, help="Per-request timeout in seconds")
+    parser.add_argument('--request-delay', type=float, help="Pause before each network request in seconds")
+    parser.add_argument('--cache-dir', help="Write every fetched page here so the run can be replayed with --offline")
+    parser.add_argument('--offline', action='store_true', default=None, help="Only replay pages from --cache-dir")
+    parser.add_argument('--formats', type=parse_format_list, help="Comma-separated output formats")
+    parser.add_argument('--output', help="Output file name without extension")
+    parser.add_argument('--spill-dir', help="Large-catalogue mode: spill rows to CSV chunks in a new run directory under this one")
+    parser.add_argument('--max-rows-in-memory', type=int,
+                        help="Number of rows (not bytes) buffered before spilling; a row is roughly 1-2 KB")
+    parser.add_argument('--profile', action='store_true', default=None,
+                        help="Profile the run (cProfile, tracemalloc, sampled stacks, asyncio tasks, page timings)")
+    parser.add_argument('--profile-dir', help="Directory for profiling run folders")
+
+
+def load_settings(command: str, args: argparse.Namespace) -> Dict:
+    """Settings of one config section, with the profile and command-line flags applied"""
+    config = load_config(args.config, args.run_profile)
+    return apply_overrides(config[command], args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='kurstap', description="Kurstap course scraper and market analytics")
+    add_config_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subparsers.add_parser('scrape', help="Scrape all courses and write the selected formats")
+    add_scrape_arguments(scrape)
+
+    charts = subparsers.add_parser('charts', help="Generate the business analytics charts")
+    charts.add_argument('--input', help="Scraped data file (xlsx, csv, json or parquet), spill run or spill directory (latest run)")
+    charts.add_argument('--charts-dir', help="Directory to write charts into")
+    charts.add_argument('--dpi', type=int, help="Chart resolution")
+    charts.add_argument('--chunksize', type=int,
+                        help="Aggregate CSV input chunk by chunk with this many rows (other formats are loaded whole)")
+    charts.add_argument('--profile', action='store_true', default=None,
+                        help="Profile the run (cProfile, tracemalloc, sampled stacks)")
+    charts.add_argument('--profile-dir', help="Directory for profiling run folders")
+
+    bench = subparsers.add_parser('bench', help="Benchmark the export stage on an existing scrape")
+    bench.add_argument('--input', help="CSV or JSON rows from a previous scrape")
+    bench.add_argument('--formats', type=parse_format_list, help="Comma-separated formats to time")
+    bench.add_argument('--repeat', type=int, help="Number of timed runs")
+
+    diff = subparsers.add_parser('diff', help="Report price, contact and catalogue changes between two scrapes")
+    diff.add_argument('old', help="Earlier snapshot: csv, json, xlsx, parquet or spill run directory")
+    diff.add_argument('new', help="Later snapshot: csv, json, xlsx, parquet, spill run or spill directory (latest run)")
+    diff.add_argument('--json-out', help="Also write the full report as a webhook-style JSON file")
+    diff.add_argument('--limit', type=int, help="Maximum items listed per section of the printed report")
+
+    return parser
+
+
+COMMANDS = {
+    'scrape': run_scrape,
+    'charts': run_charts,
+    'bench': run_bench,
+    'diff': run_diff,
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    COMMANDS[args.command](load_settings(args.command, args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Opt-in profiling for scraper and chart runs.
+
+    with profile_run(enabled=args.profile, name='scrape') as profiler:
+        if profiler:
+            profiler.watch_asyncio(asyncio.get_running_loop())
+            scraper.timing_hook = profiler.record_timing
+        ...
+
+When enabled, the run is wrapped with cProfile, tracemalloc and a
+sampling thread that records wall-clock stacks of every thread. On exit
+these files are written to a fresh run directory:
+
+    profile.pstats       cProfile stats of the main thread (load with pstats or snakeviz)
+    profile_top.txt      top functions by cumulative time
+    stacks.collapsed     sampled stacks in collapsed format for flamegraph.pl / speedscope
+    allocations.txt      top allocation sites near peak traced memory and at the end
+    asyncio_tasks.txt    wall time per asyncio task, grouped by coroutine (if watched)
+    call_timings.txt     wall time per timed step, e.g. page fetch vs parse (if recorded)
+
+Export writer processes are profiled the same way into the same folder,
+as export-<format>.pstats, export-<format>_top.txt,
+export-<format>.collapsed and export-<format>_allocations.txt.
+
+When disabled, profile_run yields None and adds no work to the run.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROFILES_DIR = Path('profiles')
+
+
+class RunProfiler:
+    """Collects cProfile, tracemalloc, sampled stacks and asyncio task timings for one run"""
+
+    def __init__(self, run_dir: Path, top_n: int = 30, sample_interval: float = 0.005, trace_frames: int = 1,
+                 name: Optional[str] = None):
+        self.run_dir = Path(run_dir)
+        # Prefix for the output files when several processes share run_dir
+        self.name = name
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        # tracemalloc slows allocation-heavy code roughly in proportion to the
+        # frames kept per allocation; one frame is enough for per-line statistics
+        self.trace_frames = trace_frames
+        # The sampler snapshots allocations whenever traced memory grows past
+        # the last snapshot by peak_growth, so allocations freed before the end
+        # of the run are still reported
+        self.peak_growth = 1.1
+        self.peak_snapshot = None
+        self.peak_snapshot_size = 0
+        self.stack_counts: Counter = Counter()
+        self.task_times: Dict[str, List[float]] = defaultdict(list)
+        self.call_times: Dict[str, List[float]] = defaultdict(list)
+        self._loop = None
+        self._previous_factory = None
+        self._stop_sampling = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._profiler = None
+        self._started = 0.0
+
+    def start(self):
+        import cProfile
+        import tracemalloc
+
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        tracemalloc.start(self.trace_frames)
+        self._sampler = threading.Thread(target=self._sample_stacks, name='profiling-sampler', daemon=True)
+        self._sampler.start()
+        self._started = time.perf_counter()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop(self):
+        import tracemalloc
+
+        self._profiler.disable()
+        if self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+            self._loop = None
+        elapsed = time.perf_counter() - self._started
+        self._stop_sampling.set()
+        self._sampler.join()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self._write_pstats(elapsed)
+        self._write_collapsed_stacks()
+        self._write_allocations(snapshot, current, peak)
+        if self.task_times:
+            self._write_times('asyncio_tasks.txt', 'coroutine', 'tasks', self.task_times)
+        if self.call_times:
+            self._write_times('call_timings.txt', 'step', 'calls', self.call_times)
+        print(f"✓ Profile{f' of {self.name}' if self.name else ''} written to {self.run_dir} ({elapsed:.2f}s run)")
+
+    def _path(self, default: str, suffix: str) -> Path:
+        """Output file: the default name, or <name><suffix> for a named profiler"""
+        return self.run_dir / (f"{self.name}{suffix}" if self.name else default)
+
+    def watch_asyncio(self, loop):
+        """Time every task created on `loop` from creation until it finishes"""
+        import asyncio
+
+        previous_factory = loop.get_task_factory()
+        self._loop, self._previous_factory = loop, previous_factory
+
+        def timed_task_factory(loop, coro, **kwargs):
+            if previous_factory is not None:
+                task = previous_factory(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            name = getattr(coro, '__qualname__', type(coro).__name__)
+            created = time.perf_counter()
+            task.add_done_callback(lambda _: self.task_times[name].append(time.perf_counter() - created))
+            return task
+
+        loop.set_task_factory(timed_task_factory)
+
+    def record_timing(self, name: str, seconds: float):
+        """Record one timed call, e.g. as the scraper's timing_hook"""
+        self.call_times[name].append(seconds)
+
+    def _sample_stacks(self):
+        """Record the stack of every other thread each sample_interval seconds"""
+        import tracemalloc
+
+        own_id = threading.get_ident()
+        labels = {}
+        thread_names = {}
+        next_peak_snapshot = 0.0
+        while not self._stop_sampling.wait(self.sample_interval):
+            current, _ = tracemalloc.get_traced_memory()
+            now = time.perf_counter()
+            if current > self.peak_snapshot_size * self.peak_growth and now >= next_peak_snapshot:
+                self.peak_snapshot = tracemalloc.take_snapshot()
+                self.peak_snapshot_size = current
+                # Snapshots of a large heap are slow; keep them to about a tenth of the run
+                next_peak_snapshot = now + 10 * (time.perf_counter() - now)
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    stack.append(label)
+                    frame = frame.f_back
+                if thread_id not in thread_names:
+                    thread_names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                stack.reverse()
+                self.stack_counts[';'.join(stack)] += 1
+
+    def _write_pstats(self, elapsed: float):
+        import io
+        import pstats
+
+        self._profiler.dump_stats(str(self._path('profile.pstats', '.pstats')))
+        out = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=out)
+        stats.sort_stats('cumulative').print_stats(self.top_n)
+        with open(self._path('profile_top.txt', '_top.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"Wall time: {elapsed:.2f}s\n")
+            f.write(out.getvalue())
+
+    def _write_collapsed_stacks(self):
+        with open(self._path('stacks.collapsed', '.collapsed'), 'w', encoding='utf-8') as f:
+            for stack, count in self.stack_counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _write_allocations(self, snapshot, current: int, peak: int):
+        import tracemalloc
+
+        # Leave out the profiling machinery itself and module loading, whose
+        # code objects would otherwise top every list
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ]
+        with open(self._path('allocations.txt', '_allocations.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory at end: {current / 1024 / 1024:.1f} MiB\n")
+            f.write(f"Peak traced memory:   {peak / 1024 / 1024:.1f} MiB\n")
+            if self.peak_snapshot is not None:
+                f.write(f"\nTop {self.top_n} allocation sites near the peak "
+                        f"({self.peak_snapshot_size / 1024 / 1024:.1f} MiB traced):\n")
+                self._write_statistics(f, self.peak_snapshot.filter_traces(filters).statistics('lineno'))
+            f.write(f"\nTop {self.top_n} allocation sites still held at end of run:\n")
+            self._write_statistics(f, snapshot.filter_traces(filters).statistics('lineno'))
+
+    def _write_statistics(self, f, statistics):
+        for i, stat in enumerate(statistics[:self.top_n], 1):
+            frame = stat.traceback[0]
+            f.write(f"{i:>3}. {frame.filename}:{frame.lineno}  "
+                    f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+
+    def _write_times(self, filename: str, label: str, count_label: str, times_by_name: Dict[str, List[float]]):
+        rows = sorted(times_by_name.items(), key=lambda item: sum(item[1]), reverse=True)
+        with open(self.run_dir / filename, 'w', encoding='utf-8') as f:
+            f.write(f"{label:<60}{count_label:>8}{'total s':>12}{'mean s':>10}{'max s':>10}\n")
+            for name, times in rows:
+                f.write(f"{name:<60}{len(times):>8}{sum(times):>12.3f}"
+                        f"{sum(times) / len(times):>10.3f}{max(times):>10.3f}\n")
+
+
+@contextmanager
+def profile_run(enabled: bool = False, name: str = 'run', profiles_dir=PROFILES_DIR, top_n: int = 30):
+    """Profile the enclosed block into profiles_dir/<name>-<timestamp> when enabled"""
+    if not enabled:
+        yield None
+        return
+
+    run_dir = Path(profiles_dir) / f"{name}-{datetime.now():%Y%m%d-%H%M%S}"
+    profiler = RunProfiler(run_dir, top_n=top_n)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
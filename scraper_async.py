@@ -1,35 +1,96 @@
+import argparse
 import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
 import csv
+import hashlib
 import json
 import re
-from typing import List, Dict, Optional
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
+import time
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Iterable, Iterator
+from exporters import (DEFAULT_FORMATS, ExportStage, ExportWriter, CsvWriter, JsonWriter,
+                       XlsxWriter, ParquetWriter, iter_batches)
+from profiling import profile_run
+from spill import mark_complete, new_run_dir
+
+# Column order of every scraped row
+FIELDNAMES = ['url', 'course_id', 'institution_name', 'course_title', 'duration', 'price',
+              'location', 'emails', 'address', 'website', 'phone_numbers']
+
 
 class KurstapAsyncScraper:
-    def __init__(self, max_concurrent_requests: int = 20):
+    def __init__(self, max_concurrent_requests: int = 20, max_per_page: int = 8, request_timeout: float = 30,
+                 request_delay: float = 0, cache_dir: Optional[str] = None, offline: bool = False,
+                 spill_dir: Optional[str] = None, max_rows_in_memory: int = 50_000):
         self.base_url = "https://www.kurstap.az"
         self.listings_url = f"{self.base_url}/kateqoriyalar"
         self.courses_data = []
         self.max_concurrent_requests = max_concurrent_requests
+        self.max_per_page = max_per_page
+        self.request_timeout = request_timeout
+        self.request_delay = request_delay
+        # Every fetched page is written to cache_dir; only offline mode reads it back,
+        # so online runs always see the live site
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.offline = offline
+        if self.offline and self.cache_dir is None:
+            raise ValueError("Offline mode requires a cache_dir to replay pages from")
+        # Large-catalogue mode: once max_rows_in_memory rows are buffered they are
+        # written as chunk_NNNNN.csv files to a new run-<timestamp> directory under
+        # spill_dir (created with the first chunk, marked complete after the crawl)
+        # and dropped from memory. The budget counts rows, not bytes; a
+        # scraped row takes roughly 1-2 KB, so the default is about 50-100 MB
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_run_dir: Optional[Path] = None
+        self.max_rows_in_memory = max_rows_in_memory
+        self.spilled_chunks: List[Path] = []
+        self.spilled_rows = 0
+        # Optional callback receiving (step name, seconds) for every page fetch
+        # and parse, e.g. RunProfiler.record_timing
+        self.timing_hook: Optional[Callable[[str, float], None]] = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
+    def record_timing(self, name: str, started: float):
+        """Report the time since `started` for one step to the timing hook, if any"""
+        if self.timing_hook is not None:
+            self.timing_hook(name, time.perf_counter() - started)
+
+    def cache_path(self, url: str, params: Dict = None) -> Path:
+        """Location of the cached copy of a page, keyed by URL and query parameters"""
+        key = url
+        if params:
+            key += '?' + '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.html"
+
     async def fetch_page(self, session: aiohttp.ClientSession, url: str, params: Dict = None) -> Optional[str]:
         """Fetch a single page asynchronously"""
+        if self.offline:
+            cached = self.cache_path(url, params)
+            if cached.exists():
+                return cached.read_text(encoding='utf-8')
+            print(f"Not in cache (offline): {url}")
+            return None
+
         try:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if self.request_delay:
+                await asyncio.sleep(self.request_delay)
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=self.request_timeout)) as response:
                 response.raise_for_status()
-                return await response.text()
+                html = await response.text()
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
 
-    async def get_course_links_from_page(self, session: aiohttp.ClientSession, offset: int = 0, max_per_page: int = 8) -> List[str]:
+        if self.cache_dir is not None:
+            cached = self.cache_path(url, params)
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            cached.write_text(html, encoding='utf-8')
+        return html
+
+    async def get_course_links_from_page(self, session: aiohttp.ClientSession, offset: int = 0, max_per_page: Optional[int] = None) -> List[str]:
         """Extract all course links from a listings page"""
         params = {
             'c': '',
@@ -44,15 +105,18 @@ class KurstapAsyncScraper:
             'subCatTitle': '',
             'title': '',
             'offset': offset,
-            'max': max_per_page
+            'max': max_per_page or self.max_per_page
         }
 
         print(f"Fetching listings page (offset={offset})...")
+        started = time.perf_counter()
         html = await self.fetch_page(session, self.listings_url, params)
+        self.record_timing('fetch_page (listing)', started)
 
         if not html:
             return []
 
+        started = time.perf_counter()
         soup = BeautifulSoup(html, 'html.parser')
 
         # Find all course links
@@ -63,6 +127,7 @@ class KurstapAsyncScraper:
                 full_url = f"{self.base_url}{href}" if href.startswith('/') else href
                 if full_url not in course_links:
                     course_links.append(full_url)
+        self.record_timing('parse_listing_page', started)
 
         print(f"Found {len(course_links)} course links on page (offset={offset})")
         return course_links
@@ -91,6 +156,110 @@ class KurstapAsyncScraper:
 
         return cleaned_numbers
 
+    def parse_course_page(self, html: str, course_url: str) -> Optional[List[Dict]]:
+        """Parse a course page into one row per phone number, or None if it has no course section"""
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Base course data (same for all rows)
+        base_data = {
+            'url': course_url,
+            'course_id': course_url.split('/kurslar/')[-1].split('/')[0] if '/kurslar/' in course_url else '',
+        }
+
+        # Extract from the course-top-part section
+        course_section = soup.select_one('section.course-top-part')
+        if not course_section:
+            print(f"Warning: Could not find course-top-part section on {course_url}")
+            return None
+
+        # Company/Institution name
+        main_name = course_section.select_one('a.main-name span:last-child')
+        base_data['institution_name'] = main_name.get_text(strip=True) if main_name else ''
+
+        # Course title
+        title_desc = course_section.select_one('.title-desc')
+        base_data['course_title'] = title_desc.get_text(strip=True) if title_desc else ''
+
+        # Course duration
+        duration_elem = course_section.find('span', string=re.compile('Kurs müddəti'))
+        if duration_elem:
+            duration_p = duration_elem.find_next('p')
+            base_data['duration'] = duration_p.get_text(strip=True) if duration_p else ''
+        else:
+            base_data['duration'] = ''
+
+        # Course price (Fərdi hazırlıq)
+        price_elem = course_section.find('span', string=re.compile('Fərdi hazırlıq'))
+        if price_elem:
+            price_p = price_elem.find_next('p')
+            base_data['price'] = price_p.get_text(strip=True) if price_p else ''
+        else:
+            base_data['price'] = ''
+
+        # City and District
+        city_elem = course_section.find('span', string=re.compile('Şəhər, Rayon'))
+        if city_elem:
+            city_p = city_elem.find_next('p')
+            base_data['location'] = city_p.get_text(strip=True).replace('\n', ', ') if city_p else ''
+        else:
+            base_data['location'] = ''
+
+        # Contact information (phone numbers and email)
+        contact_elem = course_section.find('span', string=re.compile('Əlaqə'))
+        phone_numbers_raw = []
+        emails = []
+
+        if contact_elem:
+            contact_ul = contact_elem.find_next('ul')
+            if contact_ul:
+                for li in contact_ul.find_all('li'):
+                    text = li.get_text(strip=True)
+                    # Check if it's a phone number
+                    if '+994' in text or any(char.isdigit() for char in text):
+                        # Extract individual phone numbers from potentially concatenated string
+                        extracted_phones = self.extract_phone_numbers(text)
+                        phone_numbers_raw.extend(extracted_phones)
+                    # Check if it's an email
+                    elif '@' in text:
+                        emails.append(text)
+
+        # Store emails as joined string (same for all rows)
+        base_data['emails'] = ' | '.join(emails) if emails else ''
+
+        # Address
+        address_elem = course_section.find('span', string=re.compile('Ünvan'))
+        if address_elem:
+            address_p = address_elem.find_next('p')
+            base_data['address'] = address_p.get_text(strip=True) if address_p else ''
+        else:
+            base_data['address'] = ''
+
+        # Social media / Website
+        social_elem = course_section.find('span', string=re.compile('Sosial media'))
+        website = ''
+        if social_elem:
+            social_ul = social_elem.find_next('ul')
+            if social_ul:
+                link = social_ul.find('a')
+                if link:
+                    website = link.get_text(strip=True)
+        base_data['website'] = website
+
+        # Create separate row for each phone number
+        results = []
+        if phone_numbers_raw:
+            for phone in phone_numbers_raw:
+                row = base_data.copy()
+                row['phone_numbers'] = phone
+                results.append(row)
+        else:
+            # No phone numbers found, still add the course data
+            row = base_data.copy()
+            row['phone_numbers'] = ''
+            results.append(row)
+
+        return results
+
     async def extract_course_data(self, session: aiohttp.ClientSession, course_url: str, index: int, total: int) -> Optional[List[Dict]]:
         """
         Extract all relevant data from a course page.
@@ -99,112 +268,20 @@ class KurstapAsyncScraper:
         """
         try:
             print(f"[{index}/{total}] Scraping: {course_url}")
+            started = time.perf_counter()
             html = await self.fetch_page(session, course_url)
+            self.record_timing('fetch_page (course)', started)
 
             if not html:
                 return None
 
-            soup = BeautifulSoup(html, 'html.parser')
-
-            # Base course data (same for all rows)
-            base_data = {
-                'url': course_url,
-                'course_id': course_url.split('/kurslar/')[-1].split('/')[0] if '/kurslar/' in course_url else '',
-            }
-
-            # Extract from the course-top-part section
-            course_section = soup.select_one('section.course-top-part')
-            if not course_section:
-                print(f"Warning: Could not find course-top-part section on {course_url}")
+            started = time.perf_counter()
+            results = self.parse_course_page(html, course_url)
+            self.record_timing('parse_course_page', started)
+            if results is None:
                 return None
 
-            # Company/Institution name
-            main_name = course_section.select_one('a.main-name span:last-child')
-            base_data['institution_name'] = main_name.get_text(strip=True) if main_name else ''
-
-            # Course title
-            title_desc = course_section.select_one('.title-desc')
-            base_data['course_title'] = title_desc.get_text(strip=True) if title_desc else ''
-
-            # Course duration
-            duration_elem = course_section.find('span', string=re.compile('Kurs müddəti'))
-            if duration_elem:
-                duration_p = duration_elem.find_next('p')
-                base_data['duration'] = duration_p.get_text(strip=True) if duration_p else ''
-            else:
-                base_data['duration'] = ''
-
-            # Course price (Fərdi hazırlıq)
-            price_elem = course_section.find('span', string=re.compile('Fərdi hazırlıq'))
-            if price_elem:
-                price_p = price_elem.find_next('p')
-                base_data['price'] = price_p.get_text(strip=True) if price_p else ''
-            else:
-                base_data['price'] = ''
-
-            # City and District
-            city_elem = course_section.find('span', string=re.compile('Şəhər, Rayon'))
-            if city_elem:
-                city_p = city_elem.find_next('p')
-                base_data['location'] = city_p.get_text(strip=True).replace('\n', ', ') if city_p else ''
-            else:
-                base_data['location'] = ''
-
-            # Contact information (phone numbers and email)
-            contact_elem = course_section.find('span', string=re.compile('Əlaqə'))
-            phone_numbers_raw = []
-            emails = []
-
-            if contact_elem:
-                contact_ul = contact_elem.find_next('ul')
-                if contact_ul:
-                    for li in contact_ul.find_all('li'):
-                        text = li.get_text(strip=True)
-                        # Check if it's a phone number
-                        if '+994' in text or any(char.isdigit() for char in text):
-                            # Extract individual phone numbers from potentially concatenated string
-                            extracted_phones = self.extract_phone_numbers(text)
-                            phone_numbers_raw.extend(extracted_phones)
-                        # Check if it's an email
-                        elif '@' in text:
-                            emails.append(text)
-
-            # Store emails as joined string (same for all rows)
-            base_data['emails'] = ' | '.join(emails) if emails else ''
-
-            # Address
-            address_elem = course_section.find('span', string=re.compile('Ünvan'))
-            if address_elem:
-                address_p = address_elem.find_next('p')
-                base_data['address'] = address_p.get_text(strip=True) if address_p else ''
-            else:
-                base_data['address'] = ''
-
-            # Social media / Website
-            social_elem = course_section.find('span', string=re.compile('Sosial media'))
-            website = ''
-            if social_elem:
-                social_ul = social_elem.find_next('ul')
-                if social_ul:
-                    link = social_ul.find('a')
-                    if link:
-                        website = link.get_text(strip=True)
-            base_data['website'] = website
-
-            # Create separate row for each phone number
-            results = []
-            if phone_numbers_raw:
-                for phone in phone_numbers_raw:
-                    row = base_data.copy()
-                    row['phone_numbers'] = phone
-                    results.append(row)
-            else:
-                # No phone numbers found, still add the course data
-                row = base_data.copy()
-                row['phone_numbers'] = ''
-                results.append(row)
-
-            course_title = base_data.get('course_title', 'Unknown')
+            course_title = results[0].get('course_title', 'Unknown')
             num_phones = len(results)
             print(f"✓ [{index}/{total}] Successfully scraped: {course_title} ({num_phones} phone number(s))")
             return results
@@ -217,7 +294,7 @@ class KurstapAsyncScraper:
         """Collect all course URLs from all pagination pages"""
         print("Collecting all course URLs from listings...")
         offset = 0
-        max_per_page = 8
+        max_per_page = self.max_per_page
         all_course_urls = set()
 
         while True:
@@ -236,10 +313,61 @@ class KurstapAsyncScraper:
 
         return list(all_course_urls)
 
-    async def scrape_all_courses(self):
-        """Main method to scrape all courses using async/await"""
+    @property
+    def row_count(self) -> int:
+        """Total rows scraped, both spilled to disk and still in memory"""
+        return self.spilled_rows + len(self.courses_data)
+
+    def add_rows(self, rows: List[Dict]):
+        """Buffer scraped rows, spilling to disk once the memory budget is reached"""
+        self.courses_data.extend(rows)
+        if self.spill_dir is not None and len(self.courses_data) >= self.max_rows_in_memory:
+            self.spill()
+
+    def spill(self):
+        """Write the in-memory rows to the next chunk file of this run and release them"""
+        if not self.courses_data:
+            return
+
+        if self.spill_run_dir is None:
+            self.spill_run_dir = new_run_dir(self.spill_dir)
+            print(f"Spilling rows to: {self.spill_run_dir}")
+
+        path = self.spill_run_dir / f"chunk_{len(self.spilled_chunks):05d}.csv"
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(self.courses_data)
+
+        self.spilled_chunks.append(path)
+        self.spilled_rows += len(self.courses_data)
+        self.courses_data = []
+
+    def iter_rows(self) -> Iterator[Dict]:
+        """Iterate over all scraped rows: spilled chunks first, then the in-memory buffer"""
+        for path in self.spilled_chunks:
+            with open(path, newline='', encoding='utf-8') as f:
+                yield from csv.DictReader(f)
+        yield from self.courses_data
+
+    async def scrape_all_courses(self, export_stage: Optional[ExportStage] = None):
+        """
+        Main method to scrape all courses using async/await.
+        If a started export_stage is given, every scraped course is fed to it
+        as it arrives, so output files are written while the crawl runs.
+        """
         print("Starting async scrape...")
-        print(f"Max concurrent requests: {self.max_concurrent_requests}\n")
+        print(f"Max concurrent requests: {self.max_concurrent_requests}")
+        if self.cache_dir is not None:
+            print(f"Page cache: {self.cache_dir}{' (offline replay)' if self.offline else ''}")
+        if self.spill_dir is not None:
+            print(f"Spilling every {self.max_rows_in_memory} rows to a new run under: {self.spill_dir}")
+        print()
+
+        self.spill_run_dir = None
+        self.courses_data = []
+        self.spilled_chunks = []
+        self.spilled_rows = 0
 
         connector = aiohttp.TCPConnector(limit=self.max_concurrent_requests)
         async with aiohttp.ClientSession(headers=self.headers, connector=connector) as session:
@@ -250,124 +378,135 @@ class KurstapAsyncScraper:
                 print("No courses found!")
                 return
 
-            # Create semaphore to limit concurrent requests
-            semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+            # A fixed pool of workers pulls URLs from a shared iterator, so only
+            # max_concurrent_requests course pages are in flight at any time and
+            # no per-URL task objects are created up front
+            pending = enumerate(all_course_urls, 1)
+            total = len(all_course_urls)
 
-            async def scrape_with_semaphore(url: str, idx: int) -> Optional[List[Dict]]:
-                async with semaphore:
-                    return await self.extract_course_data(session, url, idx, len(all_course_urls))
+            async def worker():
+                for idx, url in pending:
+                    result = await self.extract_course_data(session, url, idx, total)
+                    if result is not None:
+                        self.add_rows(result)
+                        if export_stage is not None:
+                            await export_stage.feed(result)
 
-            # Scrape all courses concurrently
             print("Starting to scrape individual course pages...\n")
-            tasks = [scrape_with_semaphore(url, idx) for idx, url in enumerate(all_course_urls, 1)]
-            results = await asyncio.gather(*tasks)
+            await asyncio.gather(*(worker() for _ in range(min(self.max_concurrent_requests, total))))
 
-            # Flatten results (since each result is now a list of dicts) and filter out None
-            self.courses_data = []
-            for result in results:
-                if result is not None:
-                    self.courses_data.extend(result)  # extend instead of append
+        if self.spill_dir is not None:
+            self.spill()
+            if self.spill_run_dir is not None:
+                mark_complete(self.spill_run_dir, self.spilled_rows)
 
         print(f"\n{'='*60}")
-        print(f"Scraping complete! Total courses scraped: {len(self.courses_data)}")
+        print(f"Scraping complete! Total courses scraped: {self.row_count}")
         print(f"{'='*60}")
 
+    def save_rows(self, writer: ExportWriter):
+        """Stream every scraped row (spilled chunks included) through an export writer"""
+        for batch in iter_batches(self.iter_rows()):
+            writer.write(batch)
+        writer.close()
+
     def save_to_csv(self, filename: str = 'kurstap_courses.csv'):
         """Save scraped data to CSV file"""
-        if not self.courses_data:
-            print("No data to save!")
-            return
-
-        keys = self.courses_data[0].keys()
-
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(self.courses_data)
-
-        print(f"✓ Data saved to {filename}")
+        self.save_rows(CsvWriter(filename))
 
     def save_to_json(self, filename: str = 'kurstap_courses.json'):
         """Save scraped data to JSON file"""
-        if not self.courses_data:
-            print("No data to save!")
-            return
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.courses_data, f, ensure_ascii=False, indent=2)
-
-        print(f"✓ Data saved to {filename}")
+        self.save_rows(JsonWriter(filename))
 
     def save_to_xlsx(self, filename: str = 'kurstap_courses.xlsx'):
         """Save scraped data to Excel file with formatting"""
-        if not self.courses_data:
-            print("No data to save!")
-            return
+        self.save_rows(XlsxWriter(filename))
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Kurstap Courses"
-
-        # Get headers
-        headers = list(self.courses_data[0].keys())
-
-        # Style for headers
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True, size=12)
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-        # Write headers
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-
-        # Write data
-        for row_num, course in enumerate(self.courses_data, 2):
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=course.get(header, ''))
-                cell.alignment = Alignment(wrap_text=True, vertical="top")
-
-        # Auto-adjust column widths
-        for col_num, header in enumerate(headers, 1):
-            column_letter = get_column_letter(col_num)
-            # Set minimum width
-            max_length = len(header)
-            for row in range(2, min(100, len(self.courses_data) + 2)):  # Check first 100 rows for width
-                cell_value = ws.cell(row=row, column=col_num).value
-                if cell_value:
-                    max_length = max(max_length, len(str(cell_value)))
-
-            # Set width with some padding, but cap at 50
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Freeze the header row
-        ws.freeze_panes = "A2"
-
-        wb.save(filename)
-        print(f"✓ Data saved to {filename}")
-
-
-async def main():
-    # Create scraper with max 20 concurrent requests
-    scraper = KurstapAsyncScraper(max_concurrent_requests=20)
-
-    # Scrape all courses
-    await scraper.scrape_all_courses()
-
-    # Save to CSV, JSON, and XLSX
-    print("\nSaving data to files...")
-    scraper.save_to_csv('kurstap_courses.csv')
-    scraper.save_to_json('kurstap_courses.json')
-    scraper.save_to_xlsx('kurstap_courses.xlsx')
+    def save_to_parquet(self, filename: str = 'kurstap_courses.parquet'):
+        """Save scraped data to Parquet file (requires pyarrow)"""
+        self.save_rows(ParquetWriter(filename))
+
+    async def export(self, formats: Iterable[str] = DEFAULT_FORMATS, basename: str = 'kurstap_courses') -> Dict[str, float]:
+        """
+        Write already scraped rows in every requested format through an
+        ExportStage. To overlap writing with the crawl, pass a started stage
+        to scrape_all_courses() instead. Returns the seconds until each
+        format's file was finished.
+        """
+        stage = ExportStage(formats, basename)
+        if not self.row_count:
+            print("No data to save!")
+            return {}
+
+        stage.start()
+        for batch in iter_batches(self.iter_rows(), stage.batch_size):
+            await stage.feed(batch)
+        return await stage.close()
+
+
+def run_scrape(settings: Dict):
+    """
+    Scrape every course and write the requested formats while the crawl
+    runs, using the settings of the [scrape] section of kurstap.toml (see
+    kurstap.py). Shared by `python scraper_async.py` and `kurstap scrape`.
+    """
+    from kurstap import check_formats
+
+    check_formats(settings['formats'])
+    if settings['offline'] and not settings['cache_dir']:
+        raise SystemExit("Offline mode needs a cache_dir to replay pages from (set --cache-dir)")
+
+    scraper = KurstapAsyncScraper(
+        max_concurrent_requests=settings['max_concurrent_requests'],
+        max_per_page=settings['max_per_page'],
+        request_timeout=settings['request_timeout'],
+        request_delay=settings['request_delay'],
+        cache_dir=settings['cache_dir'] or None,
+        offline=settings['offline'],
+        spill_dir=settings['spill_dir'] or None,
+        max_rows_in_memory=settings['max_rows_in_memory'],
+    )
+
+    # Writers start before the crawl and receive rows as they are scraped
+    export_stage = ExportStage(settings['formats'], settings['output'])
+
+    async def scrape_and_export():
+        with profile_run(settings['profile'], 'scrape', settings['profile_dir']) as profiler:
+            if profiler:
+                profiler.watch_asyncio(asyncio.get_running_loop())
+                scraper.timing_hook = profiler.record_timing
+
+            # Scrape all courses, writing output as rows arrive
+            export_stage.start(profiler.run_dir if profiler else None)
+            await scraper.scrape_all_courses(export_stage)
+
+            # Finish the output files
+            print("\nFinishing output files...")
+            await export_stage.close()
+
+    asyncio.run(scrape_and_export())
 
     # Print summary
-    if scraper.courses_data:
+    if scraper.row_count:
         print(f"\nSample of first course:")
-        print(json.dumps(scraper.courses_data[0], ensure_ascii=False, indent=2))
+        print(json.dumps(next(scraper.iter_rows()), ensure_ascii=False, indent=2))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """The flags of `kurstap scrape`, plus --config and --run-profile"""
+    from kurstap import add_config_arguments, add_scrape_arguments
+
+    parser = argparse.ArgumentParser(description="Scrape all courses from kurstap.az")
+    add_config_arguments(parser)
+    add_scrape_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    from kurstap import load_settings
+
+    run_scrape(load_settings('scrape', parse_args(argv)))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -0,0 +1,356 @@
+"""
+Change detection between two Kurstap scrape snapshots.
+
+Compares an old and a new scrape keyed by course_id and reports new and
+removed courses and institutions, plus field-level changes in price,
+duration, contacts and location. Scrapes hold one row per phone number,
+so rows are first folded into one record per course page URL. Different
+pages can share a course_id (e.g. /kurslar/2010/... and
+/shirket/kurslar/2010), so such ids fall back to keying by URL. Snapshots
+are loaded column-wise into pandas and every course gets a stable hash of
+its compared fields. The join is an index join, so per-course tuples are
+only built for courses that were added, removed or whose hashes differ.
+
+    python snapshot_diff.py old.csv new.csv [--json-out changes.json]
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from spill import chunk_files
+
+# Field groups reported as changed, and the scraped columns each one covers
+COMPARED_FIELDS = {
+    'price': ('price',),
+    'duration': ('duration',),
+    'contacts': ('phone_numbers', 'emails', 'website'),
+    'location': ('location', 'address'),
+}
+
+# Columns kept per course: identifying columns first, then the compared ones
+INFO_COLUMNS = ('course_id', 'institution_name', 'course_title', 'url')
+COMPARED_COLUMNS = tuple(field for fields in COMPARED_FIELDS.values() for field in fields)
+COLUMNS = INFO_COLUMNS + COMPARED_COLUMNS
+COLUMN_INDEX = {column: i for i, column in enumerate(COLUMNS)}
+ID_INDEX = COLUMN_INDEX['course_id']
+
+
+def clean(value) -> str:
+    """Normalise a cell value from any input format to a stripped string"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value != value:
+        return ''
+    return str(value).strip()
+
+
+def iter_snapshot_rows(path) -> Iterator[Dict]:
+    """Yield scraped rows as dicts from a JSON, XLSX or Parquet export"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.json':
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+    elif suffix == '.xlsx':
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [clean(header) for header in next(rows, ())]
+        for values in rows:
+            yield dict(zip(headers, values))
+        wb.close()
+    elif suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported snapshot format: {path}")
+
+
+def read_csv_columns(path) -> pd.DataFrame:
+    """
+    Read the COLUMNS present in a CSV export as strings, with pyarrow's
+    parser when it is installed. Rows whose cell count does not match the
+    header, e.g. from hand-edited files, are padded or cut to the header.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), [])
+    if not header:
+        return pd.DataFrame(columns=list(COLUMNS))
+    wanted = [column for column in COLUMNS if column in header]
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        # pandas' C parser fills missing trailing cells itself
+        return pd.read_csv(path, dtype=str, keep_default_na=False, usecols=wanted)
+
+    bad_rows = []
+
+    def keep_bad_row(row):
+        bad_rows.append(row.text)
+        return 'skip'
+
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=keep_bad_row),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=wanted,
+            column_types={column: pa.string() for column in wanted},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    df = table.to_pandas()
+    if bad_rows:
+        width = len(header)
+        rows = [(row + [''] * width)[:width] for row in csv.reader(io.StringIO('\n'.join(bad_rows)))]
+        df = pd.concat([df, pd.DataFrame(rows, columns=header)[wanted]], ignore_index=True)
+    return df
+
+
+def read_snapshot_columns(path) -> pd.DataFrame:
+    """Every row of a snapshot or spill directory as strings in COLUMNS order, '' where missing"""
+    path = Path(path)
+    if path.is_dir():
+        chunks = [read_csv_columns(chunk) for chunk in chunk_files(path)]
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    elif path.suffix.lower() == '.csv':
+        df = read_csv_columns(path)
+    else:
+        # Cells from JSON, XLSX and Parquet can be numbers or padded strings
+        df = pd.DataFrame.from_records(iter_snapshot_rows(path))
+        df = df[[column for column in COLUMNS if column in df.columns]]
+        df = df.fillna('').astype(str).apply(lambda column: column.str.strip())
+
+    df = df.reindex(columns=list(COLUMNS))
+    return df.fillna('')
+
+
+def load_snapshot(path) -> pd.DataFrame:
+    """
+    Fold a snapshot into one row per course page URL, indexed by URL, with
+    COLUMNS and a fingerprint of the COMPARED_COLUMNS. phone_numbers holds every distinct phone of
+    the course, sorted and joined; other values come from its first row.
+    """
+    rows = read_snapshot_columns(path)
+    rows['key'] = rows['url'].where(rows['url'] != '', rows['course_id'])
+    rows = rows[rows['key'] != '']
+    courses = rows.drop_duplicates('key').set_index('key')
+
+    # Only courses listed with several phone numbers need their rows merged.
+    # The sorted phones are joined column-wise: first phones, then second ones, ...
+    repeated = rows['key'].duplicated(keep=False) & (rows['phone_numbers'] != '')
+    if repeated.any():
+        phones = rows.loc[repeated, ['key', 'phone_numbers']].drop_duplicates().sort_values(['key', 'phone_numbers'])
+        position = phones.groupby('key', sort=False).cumcount()
+        merged = phones[position == 0].set_index('key')['phone_numbers']
+        for n in range(1, position.max() + 1):
+            more = phones[position == n].set_index('key')['phone_numbers']
+            merged.loc[more.index] = merged.loc[more.index] + ' | ' + more
+        courses['phone_numbers'] = merged.reindex(courses.index).fillna(courses['phone_numbers'])
+
+    # Vectorised 64-bit hash with a fixed key, so fingerprints are stable across runs.
+    # Only the compared columns are hashed: other changes are never reported
+    courses['fingerprint'] = pd.util.hash_pandas_object(courses[list(COMPARED_COLUMNS)], index=False,
+                                                        categorize=False)
+    return courses
+
+
+def shared_course_ids(snapshot: pd.DataFrame) -> set:
+    """course_ids that belong to more than one course page in a snapshot"""
+    ids = snapshot['course_id']
+    return set(ids[ids.duplicated() & (ids != '')])
+
+
+def key_by_course_id(snapshot: pd.DataFrame, shared: set) -> pd.DataFrame:
+    """Re-index a loaded snapshot by course_id, keeping the URL key for empty or shared ids"""
+    ids = snapshot['course_id']
+    keep_url = (ids == '') | ids.isin(shared)
+    keys = ids.mask(keep_url, snapshot.index.to_series(index=snapshot.index))
+    # Object keys are hashed once per index; Arrow-backed ones are converted for every lookup
+    return snapshot.set_axis(pd.Index(keys, dtype=object), axis=0)
+
+
+def course_values(snapshot: pd.DataFrame, keys: List[str]) -> Dict[str, Tuple[str, ...]]:
+    """COLUMNS values of the given courses as tuples; only built for the keys asked for"""
+    rows = snapshot.loc[keys, list(COLUMNS)]
+    return dict(zip(rows.index, rows.itertuples(index=False, name=None)))
+
+
+def describe(values: Tuple[str, ...]) -> Dict:
+    return {
+        'course_id': values[ID_INDEX],
+        'institution_name': values[COLUMN_INDEX['institution_name']],
+        'course_title': values[COLUMN_INDEX['course_title']],
+        'url': values[COLUMN_INDEX['url']],
+    }
+
+
+def field_changes(old_values: Tuple[str, ...], new_values: Tuple[str, ...]) -> Dict[str, Dict]:
+    """Per field group, the old and new values of every column that differs"""
+    changes = {}
+    for group, fields in COMPARED_FIELDS.items():
+        diff = {}
+        for field in fields:
+            i = COLUMN_INDEX[field]
+            if old_values[i] != new_values[i]:
+                diff[field] = {'old': old_values[i], 'new': new_values[i]}
+        if diff:
+            changes[group] = diff
+    return changes
+
+
+def institutions(snapshot: pd.DataFrame) -> set:
+    names = snapshot['institution_name']
+    return set(names[names != ''].unique())
+
+
+def diff_snapshots(old: pd.DataFrame, new: pd.DataFrame) -> Dict:
+    """Compare two loaded snapshots and build a JSON-serialisable change report"""
+    # Join on course_id, except for ids that several pages share in either snapshot
+    shared = shared_course_ids(old) | shared_course_ids(new)
+    old, new = key_by_course_id(old, shared), key_by_course_id(new, shared)
+
+    added = sorted(new.index.difference(old.index))
+    removed = sorted(old.index.difference(new.index))
+
+    # Join on the course key; only fingerprint mismatches are compared field by field
+    joined = old[['fingerprint']].join(new[['fingerprint']], how='inner', lsuffix='_old', rsuffix='_new')
+    changed_keys = sorted(joined.index[joined['fingerprint_old'] != joined['fingerprint_new']])
+    old_changed, new_changed = course_values(old, changed_keys), course_values(new, changed_keys)
+
+    changed = []
+    field_counts = {group: 0 for group in COMPARED_FIELDS}
+    for key in changed_keys:
+        new_values = new_changed[key]
+        changes = field_changes(old_changed[key], new_values)
+        if not changes:
+            continue
+        for group in changes:
+            field_counts[group] += 1
+        changed.append({**describe(new_values), 'changes': changes})
+
+    old_institutions, new_institutions = institutions(old), institutions(new)
+    institutions_added = sorted(new_institutions - old_institutions)
+    institutions_removed = sorted(old_institutions - new_institutions)
+
+    return {
+        'summary': {
+            'courses_old': len(old),
+            'courses_new': len(new),
+            'courses_added': len(added),
+            'courses_removed': len(removed),
+            'courses_changed': len(changed),
+            'field_changes': field_counts,
+            'institutions_added': len(institutions_added),
+            'institutions_removed': len(institutions_removed),
+        },
+        'added_courses': [describe(values) for values in course_values(new, added).values()],
+        'removed_courses': [describe(values) for values in course_values(old, removed).values()],
+        'changed_courses': changed,
+        'institutions_added': institutions_added,
+        'institutions_removed': institutions_removed,
+    }
+
+
+def format_report(report: Dict, limit: int = 20) -> str:
+    """Compact human-readable change report, listing at most `limit` items per section"""
+    summary = report['summary']
+    lines = [
+        "=" * 60,
+        "SNAPSHOT CHANGES",
+        "=" * 60,
+        f"Courses: {summary['courses_old']} -> {summary['courses_new']} "
+        f"(+{summary['courses_added']} / -{summary['courses_removed']}, {summary['courses_changed']} changed)",
+        "Field changes: " + ', '.join(f"{group} {count}" for group, count in summary['field_changes'].items()),
+        f"Institutions: +{summary['institutions_added']} / -{summary['institutions_removed']}",
+    ]
+
+    def section(title: str, items: List, render) -> None:
+        if not items:
+            return
+        lines.append(f"\n{title} ({len(items)}):")
+        lines.extend(f"  {render(item)}" for item in items[:limit])
+        if len(items) > limit:
+            lines.append(f"  ... and {len(items) - limit} more")
+
+    def course_label(course: Dict) -> str:
+        return f"[{course['course_id']}] {course['institution_name']} - {course['course_title']}"
+
+    def change_label(course: Dict) -> str:
+        parts = [
+            f"{field}: {values['old'] or '-'} -> {values['new'] or '-'}"
+            for fields in course['changes'].values()
+            for field, values in fields.items()
+        ]
+        return f"{course_label(course)}: " + '; '.join(parts)
+
+    section("New institutions", report['institutions_added'], str)
+    section("Removed institutions", report['institutions_removed'], str)
+    section("New courses", report['added_courses'], course_label)
+    section("Removed courses", report['removed_courses'], course_label)
+    section("Changed courses", report['changed_courses'], change_label)
+    lines.append("=" * 60)
+    return '\n'.join(lines)
+
+
+def write_json_report(report: Dict, filename: str, old_path, new_path) -> None:
+    """Write the report as a webhook-style JSON payload"""
+    payload = {
+        'event': 'kurstap.snapshot_diff',
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'old_snapshot': str(old_path),
+        'new_snapshot': str(new_path),
+        **report,
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"✓ Change report saved to {filename}")
+
+
+def run_diff(old_path, new_path, json_out: Optional[str] = None, limit: int = 20) -> Dict:
+    """Load both snapshots, diff them, print the report and optionally write the JSON payload"""
+    started = time.perf_counter()
+    old = load_snapshot(old_path)
+    new = load_snapshot(new_path)
+    loaded = time.perf_counter()
+    report = diff_snapshots(old, new)
+    finished = time.perf_counter()
+
+    print(format_report(report, limit))
+    print(f"Loaded in {loaded - started:.2f}s, diffed in {finished - loaded:.2f}s")
+
+    if json_out:
+        write_json_report(report, json_out, old_path, new_path)
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report changes between two Kurstap scrape snapshots")
+    parser.add_argument('old', help="Earlier snapshot: csv, json, xlsx, parquet or spill run directory")
+    parser.add_argument('new', help="Later snapshot: csv, json, xlsx, parquet, spill run or spill directory (latest run)")
+    parser.add_argument('--json-out', help="Also write the full report as a webhook-style JSON file")
+    parser.add_argument('--limit', type=int, default=20,
+                        help="Maximum items listed per section of the printed report (default: 20)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    run_diff(args.old, args.new, args.json_out, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Layout of the large-catalogue spill directory.
+
+Every scrape writes its chunks to a fresh run directory, so a new run
+never touches the chunks of an earlier one. The run directory is created
+with the first chunk, and a COMPLETE marker is written once the crawl has
+finished:
+
+    spill/
+        run-20250101-060000/chunk_00000.csv, chunk_00001.csv, ..., COMPLETE
+        run-20250102-060000/chunk_00000.csv, ...   (crashed or still running)
+
+Readers accept either a run directory or the spill directory itself, in
+which case the most recent complete run is used.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+COMPLETE_MARKER = 'COMPLETE'
+
+
+def new_run_dir(spill_dir) -> Path:
+    """Create the chunk directory for a new scrape under spill_dir"""
+    run_dir = Path(spill_dir) / f"run-{datetime.now():%Y%m%d-%H%M%S}"
+    # Refuse to reuse an existing directory rather than mixing two runs' chunks
+    run_dir.mkdir(parents=True)
+    return run_dir
+
+
+def mark_complete(run_dir, rows: int):
+    """Record that every chunk of the run has been written"""
+    (Path(run_dir) / COMPLETE_MARKER).write_text(f"{rows}\n", encoding='utf-8')
+
+
+def is_complete(run_dir) -> bool:
+    return (Path(run_dir) / COMPLETE_MARKER).is_file()
+
+
+def chunk_files(path) -> List[Path]:
+    """Chunk files of a run directory, or of the latest complete run when given the spill directory"""
+    path = Path(path)
+    chunks = sorted(path.glob('chunk_*.csv'))
+    if chunks:
+        return chunks
+
+    # Runs without a marker crashed or are still being written
+    runs = sorted(run for run in path.glob('run-*') if run.is_dir() and is_complete(run))
+    return sorted(runs[-1].glob('chunk_*.csv')) if runs else []
@@ -0,0 +1,72 @@
+import csv
+
+from snapshot_diff import diff_snapshots, load_snapshot
+
+HEADER = ['url', 'course_id', 'institution_name', 'course_title', 'duration', 'price',
+          'location', 'emails', 'address', 'website', 'phone_numbers']
+
+
+def write_snapshot(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=HEADER, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def course(url, course_id, **fields):
+    row = {'url': url, 'course_id': course_id, 'institution_name': 'Inst', 'course_title': 'Course',
+           'duration': '1 ay', 'price': '10 AZN', 'location': 'Bakı'}
+    row.update(fields)
+    return row
+
+
+def diff(tmp_path, old_rows, new_rows):
+    old = load_snapshot(write_snapshot(tmp_path / 'old.csv', old_rows))
+    new = load_snapshot(write_snapshot(tmp_path / 'new.csv', new_rows))
+    return diff_snapshots(old, new)
+
+
+def test_phone_rows_are_merged_per_course(tmp_path):
+    old = [course('/kurslar/1/a', '1', phone_numbers='+994 50 2'),
+           course('/kurslar/1/a', '1', phone_numbers='+994 50 1')]
+    new = [course('/kurslar/1/a', '1', phone_numbers='+994 50 1'),
+           course('/kurslar/1/a', '1', phone_numbers='+994 50 2'),
+           course('/kurslar/1/a', '1', phone_numbers='+994 50 3')]
+
+    snapshot = load_snapshot(write_snapshot(tmp_path / 'old.csv', old))
+    assert list(snapshot['phone_numbers']) == ['+994 50 1 | +994 50 2']
+
+    report = diff(tmp_path, old, new)
+    assert report['summary']['courses_changed'] == 1
+    assert report['changed_courses'][0]['changes'] == {
+        'contacts': {'phone_numbers': {'old': '+994 50 1 | +994 50 2', 'new': '+994 50 1 | +994 50 2 | +994 50 3'}},
+    }
+
+
+def test_phone_order_is_not_a_change(tmp_path):
+    old = [course('/kurslar/1/a', '1', phone_numbers='+994 50 1'),
+           course('/kurslar/1/a', '1', phone_numbers='+994 50 2')]
+    new = list(reversed(old))
+
+    assert diff(tmp_path, old, new)['summary']['courses_changed'] == 0
+
+
+def test_shared_course_ids_are_keyed_by_url(tmp_path):
+    old = [course('/kurslar/2010/a', '2010', price='10 AZN'),
+           course('/shirket/kurslar/2010', '2010', price='20 AZN')]
+    new = [course('/kurslar/2010/a', '2010', price='10 AZN'),
+           course('/shirket/kurslar/2010', '2010', price='25 AZN')]
+
+    report = diff(tmp_path, old, new)
+    assert report['summary']['courses_added'] == 0
+    assert report['summary']['courses_removed'] == 0
+    assert [item['url'] for item in report['changed_courses']] == ['/shirket/kurslar/2010']
+    assert report['changed_courses'][0]['changes'] == {'price': {'price': {'old': '20 AZN', 'new': '25 AZN'}}}
+
+
+def test_only_compared_fields_are_reported(tmp_path):
+    old = [course('/kurslar/1/a', '1', course_title='Old title')]
+    new = [course('/kurslar/1/a', '1', course_title='New title')]
+
+    assert diff(tmp_path, old, new)['summary']['courses_changed'] == 0